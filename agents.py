@@ -9,327 +9,1093 @@ Agents:
   5. marketing_agent    — generates full mock landing page HTML
 """
 
-import os, json, re, logging, requests
+import os, sys, json, re, time, queue, atexit, asyncio, threading, hashlib, functools, contextvars, dataclasses, logging
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TypedDict, Optional
-from datetime import datetime
-from langgraph.graph import StateGraph, START, END
+from types import MappingProxyType
+from typing import Mapping, Optional
+from cachetools import LRUCache
+
+# orjson encodes the large mock payloads several times faster (and serialises
+# dataclasses natively); stdlib json is the fallback
+try:
+    import orjson
+
+    def _dumps(obj, indent: bool = False) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+
+    _encode = orjson.dumps
+    _loads  = orjson.loads
+except ImportError:
+    def _dumps(obj, indent: bool = False) -> str:
+        return json.dumps(obj, default=dataclasses.asdict, ensure_ascii=False, indent=2 if indent else None)
+
+    def _encode(obj) -> bytes:
+        # Same bytes orjson would give, so payload_key doesn't depend on it
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    _loads = json.loads
 
 # ── Logging ───────────────────────────────────────────────────────────────────
+# Records go through a queue; a background listener does the file writes so
+# concurrent agents never block on the file handler's lock. Set up on first
+# pipeline/LLM use, so importing the module (e.g. just for _mock) writes nothing.
 log_dir = Path(__file__).parent / "logs"
-log_dir.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(handlers=[logging.FileHandler(log_dir / "relaunch_ai.json")], level=logging.INFO)
 logger = logging.getLogger("relaunch_ai")
 
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per line; runs on the listener thread, not the caller's."""
+    _FIELDS = ("agent", "startup")
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": self.formatTime(record), "level": record.levelname, "msg": record.getMessage()}
+        entry.update((k, v) for k in self._FIELDS if (v := getattr(record, k, None)) is not None)
+        return _dumps(entry)
+
+
+@functools.cache
+def _ensure_logging() -> None:
+    import logging.handlers
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_queue: queue.Queue = queue.Queue(-1)
+    file_handler = logging.FileHandler(log_dir / "relaunch_ai.json")
+    file_handler.setFormatter(_JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _log_agent(agent: str, state: "AutopsyState") -> None:
+    # %-args are only merged if INFO is enabled; the JSON is built by the listener
+    logger.info("agent=%s startup=%s", agent, state.startup_name,
+                extra={"agent": agent, "startup": state.startup_name})
+
 # ── Deploy AI ─────────────────────────────────────────────────────────────────
 AUTH_URL      = "https://api-auth.deploy.ai/oauth2/token"
 API_URL       = "https://core-api.deploy.ai"
 CLIENT_ID     = os.getenv("CLIENT_ID", "")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET", "")
 ORG_ID        = os.getenv("ORG_ID", "59f3dce8-2dcf-4a7f-b6ff-d2cbce1231dc")
+LLM_MODEL     = "GPT_4O"
+SUMMARY_MODEL = os.getenv("SUMMARY_AGENT_ID", LLM_MODEL)  # cheaper agent for condensing long inputs
+PREWARM       = os.getenv("RELAUNCH_PREWARM", "1") == "1"  # set to 0 to skip (tests, offline runs)
+
+
+@functools.cache
+def _client():
+    """
+    One shared async client so concurrent agents overlap their network I/O.
+    Auth, chats and messages calls reuse pooled keep-alive sockets instead of
+    paying a fresh TCP+TLS handshake per request, and HTTP/2 lets concurrent
+    agent calls multiplex over a single connection per host. Built (and httpx
+    imported) on first use; the mock path never needs it.
+    """
+    import httpx
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(120, connect=10),
+        headers={"X-Org": ORG_ID, "accept": "application/json"},
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        ),
+    )
+
+
+# (token, monotonic deadline) — refreshed only when close to expiry
+_TOKEN_CACHE: tuple[str, float] = ("", 0.0)
+_TOKEN_LOCK = asyncio.Lock()
+_TOKEN_LEEWAY = 30  # seconds before expiry at which the token is refreshed
+
+
+async def _token():
+    global _TOKEN_CACHE
+    async with _TOKEN_LOCK:
+        tok, deadline = _TOKEN_CACHE
+        if tok and time.monotonic() < deadline - _TOKEN_LEEWAY:
+            return tok
+        r = await _client().post(AUTH_URL, data={
+            "grant_type": "client_credentials",
+            "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET
+        }, timeout=15)
+        body = r.json()
+        _TOKEN_CACHE = (body["access_token"], time.monotonic() + float(body.get("expires_in", 300)))
+        return _TOKEN_CACHE[0]
+
+
+async def prewarm():
+    """
+    Open keep-alive connections to both Deploy AI hosts before the first request
+    so the first agent call doesn't pay DNS + TCP + TLS setup. Fetching the token
+    warms the auth host and fills the token cache; errors are ignored.
+    """
+    if not PREWARM or not CLIENT_ID or not CLIENT_SECRET:
+        return
+    _ensure_logging()
+
+    async def _warm(coro):
+        try:
+            await coro
+        except Exception as e:
+            logger.info("Prewarm skipped: %s", e)
+
+    await asyncio.gather(_warm(_token()), _warm(_client().head(f"{API_URL}/health", timeout=5)))
+
+
+async def _post_json(url: str, headers: dict, payload: dict, timeout: float):
+    """
+    POST a pre-encoded JSON body and collect the reply while it streams in,
+    decoding once at the end — no intermediate text copy of large responses.
+    """
+    async with _client().stream("POST", url, content=_encode(payload), timeout=timeout,
+                                    headers={**headers, "Content-Type": "application/json"}) as r:
+        r.raise_for_status()
+        buf = bytearray()
+        async for chunk in r.aiter_bytes():
+            buf += chunk
+    return _loads(bytes(buf))
+
+
+# ── LLM response cache ────────────────────────────────────────────────────────
+# Real (non-mock) replies keyed on sha256(model|system|user) in a local SQLite
+# file, so resubmitting the same startup skips the LLM entirely. Set
+# LLM_CACHE_RO=1 to read without writing (deterministic eval runs).
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", Path(__file__).parent / ".llm_cache.sqlite"))
+LLM_CACHE_TTL  = 86400
+LLM_CACHE_RO   = os.getenv("LLM_CACHE_RO", "0") == "1"
+
+# One connection shared by the to_thread workers; every use (and its creation)
+# happens under this lock, as sqlite3 requires with check_same_thread=False
+_LLM_CACHE_LOCK = threading.Lock()
+_LLM_CACHE_DB = None
+# Expired rows are deleted when the file is opened and then at most this often
+# (seconds) on writes, so the file doesn't keep every prompt ever seen
+LLM_CACHE_PURGE_EVERY = 3600
+_LLM_CACHE_PURGED = 0.0
+
+
+def _purge_expired(db) -> None:
+    """Delete expired rows. Hold _LLM_CACHE_LOCK."""
+    global _LLM_CACHE_PURGED
+    _LLM_CACHE_PURGED = now = time.time()
+    db.execute("DELETE FROM llm WHERE expires < ?", (now,))
+
+
+def _llm_cache():
+    """Return the shared connection, opening it on first use. Hold _LLM_CACHE_LOCK."""
+    global _LLM_CACHE_DB
+    if _LLM_CACHE_DB is None:
+        import sqlite3
+        db = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False, isolation_level=None)
+        db.execute("CREATE TABLE IF NOT EXISTS llm (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+        if not LLM_CACHE_RO:
+            db.execute("CREATE INDEX IF NOT EXISTS llm_expires ON llm (expires)")
+            _purge_expired(db)
+        _LLM_CACHE_DB = db
+    return _LLM_CACHE_DB
+
+
+def _cache_key(system: str, user: str, model: str = LLM_MODEL) -> str:
+    return hashlib.sha256(f"{model}|{system}|{user}".encode()).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    try:
+        with _LLM_CACHE_LOCK:
+            row = _llm_cache().execute("SELECT value, expires FROM llm WHERE key = ?", (key,)).fetchone()
+    except Exception as e:
+        logger.warning("LLM cache read failed: %s", e)
+        return None
+    return row[0] if row and row[1] > time.time() else None
+
+
+def _cache_put(key: str, value: str) -> None:
+    if LLM_CACHE_RO:
+        return
+    try:
+        with _LLM_CACHE_LOCK:
+            db = _llm_cache()
+            db.execute("INSERT OR REPLACE INTO llm VALUES (?, ?, ?)",
+                       (key, value, time.time() + LLM_CACHE_TTL))
+            if time.time() - _LLM_CACHE_PURGED > LLM_CACHE_PURGE_EVERY:
+                _purge_expired(db)
+    except Exception as e:
+        logger.warning("LLM cache write failed: %s", e)
+
+
+# None until probed; afterwards whether Deploy AI accepts a chat-less one-shot call
+_ONESHOT_SUPPORTED: Optional[bool] = None
+_ONESHOT_LOCK: Optional[tuple] = None  # (loop, lock) so a lock never outlives its loop
+# Probe outcomes that mean the route or its reply shape won't work for us
+_ONESHOT_UNSUPPORTED = (400, 404, 405, 422)
+
+
+def _oneshot_lock() -> asyncio.Lock:
+    global _ONESHOT_LOCK
+    loop = asyncio.get_running_loop()
+    if _ONESHOT_LOCK is None or _ONESHOT_LOCK[0] is not loop:
+        _ONESHOT_LOCK = (loop, asyncio.Lock())
+    return _ONESHOT_LOCK[1]
+
+
+async def _oneshot(h: dict, content: list, model: str) -> Optional[str]:
+    """
+    Try a single-round-trip completion (no /chats step). The first call probes
+    the endpoint under a lock; if the probe fails in any way the caller falls
+    through to the two-step flow for that call. A 400/404/405/422, an
+    unexpected reply shape or a timeout marks one-shot unsupported for good;
+    transient errors (401, 429, 5xx, connection) leave it to be probed again.
+    """
+    global _ONESHOT_SUPPORTED
+    if _ONESHOT_SUPPORTED is None:
+        async with _oneshot_lock():
+            if _ONESHOT_SUPPORTED is None:
+                import httpx
+                try:
+                    value = await _completion(h, content, model)
+                except Exception as e:
+                    status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                    if status in _ONESHOT_UNSUPPORTED or isinstance(e, (KeyError, IndexError, TypeError,
+                                                                        httpx.TimeoutException)):
+                        logger.info("One-shot completions unavailable, using chat + message flow: %r", e)
+                        _ONESHOT_SUPPORTED = False
+                    else:
+                        logger.warning("One-shot probe failed, using chat + message flow: %r", e)
+                    return None
+                _ONESHOT_SUPPORTED = True
+                return value
+    if _ONESHOT_SUPPORTED is False:
+        return None
+    return await _completion(h, content, model)
+
+
+async def _completion(h: dict, content: list, model: str) -> str:
+    return (await _post_json(f"{API_URL}/completions", h, {
+        "agentId": model, "stream": False, "content": content
+    }, timeout=120))["content"][0]["value"]
+
+
+# A chat created ahead of time for the next two-step call. Opening a chat
+# doesn't depend on the prompt, so its round trip overlaps the current
+# agent's generation instead of sitting on the critical path of the next one.
+_SPARE_CHAT: Optional[asyncio.Task] = None
+
+
+async def _new_chat(h: dict, model: str = LLM_MODEL) -> str:
+    return (await _post_json(f"{API_URL}/chats", h,
+                             {"agentId": model, "stream": False}, timeout=15))["id"]
+
+
+async def _prefetch_chat(h: dict) -> Optional[str]:
+    try:
+        return await _new_chat(h)
+    except Exception:
+        return None
+
+
+async def _chat_id(h: dict, model: str) -> str:
+    """Take the pre-opened chat if there is one, and start opening the next."""
+    global _SPARE_CHAT
+    if model != LLM_MODEL:  # spares are only kept for the agents' model
+        return await _new_chat(h, model)
+    spare, _SPARE_CHAT = _SPARE_CHAT, asyncio.create_task(_prefetch_chat(h))
+    cid = None
+    if spare is not None and not spare.cancelled():
+        try:
+            cid = await spare
+        except Exception:  # e.g. opened on an event loop that has since closed
+            pass
+    return cid or await _new_chat(h)
 
 
-def _token():
-    r = requests.post(AUTH_URL, data={
-        "grant_type": "client_credentials",
-        "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET
-    }, timeout=15)
-    return r.json()["access_token"]
+# Set per run_analysis to a one-item list that allm flips when a real LLM call
+# failed and a mock reply stood in. Tasks copy the context but share the list,
+# so fan-out inside the graph still reports back to the run.
+_FELL_BACK: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("_FELL_BACK", default=None)
 
 
-def llm(system: str, user: str) -> str:
+async def allm(system: str, user: str, model: str = LLM_MODEL) -> str:
+    global _TOKEN_CACHE
     if not CLIENT_ID or not CLIENT_SECRET:
         return _mock(system, user)
+    _ensure_logging()
+    key = _cache_key(system, user, model)
+    # SQLite I/O runs on a worker thread so a slow disk never stalls the loop
+    cached = await asyncio.to_thread(_cache_get, key)
+    if cached is not None:
+        return cached
     try:
-        tok = _token()
-        h = {"Authorization": f"Bearer {tok}", "X-Org": ORG_ID,
-             "Content-Type": "application/json", "accept": "application/json"}
-        cid = requests.post(f"{API_URL}/chats", headers=h,
-                            json={"agentId": "GPT_4O", "stream": False}, timeout=15).json()["id"]
-        return requests.post(f"{API_URL}/messages", headers=h, json={
-            "chatId": cid, "stream": False,
-            "content": [{"type": "text", "value": f"SYSTEM:\n{system}\n\nUSER:\n{user}"}]
-        }, timeout=120).json()["content"][0]["value"]
+        tok = await _token()
+        h = {"Authorization": f"Bearer {tok}"}
+        # The fixed system prompt leads, so every call for an agent shares a
+        # byte-identical prefix that provider-side prompt caching can reuse
+        content = [{"type": "text", "value": f"SYSTEM:\n{system}\n\nUSER:\n{user}"}]
+        value = await _oneshot(h, content, model)
+        if value is None:
+            cid = await _chat_id(h, model)
+            value = (await _post_json(f"{API_URL}/messages", h, {
+                "chatId": cid, "stream": False, "content": content
+            }, timeout=120))["content"][0]["value"]
     except Exception as e:
-        logger.warning(f"LLM error: {e}")
+        logger.warning("LLM error: %s", e)
+        if getattr(getattr(e, "response", None), "status_code", None) == 401:
+            _TOKEN_CACHE = ("", 0.0)  # a rejected token must not be reused
+        if (flag := _FELL_BACK.get()) is not None:
+            flag[0] = True
         return _mock(system, user)
+    await asyncio.to_thread(_cache_put, key, value)
+    return value
 
 
 # ── Current year (used throughout mock responses) ─────────────────────────────
-CUR_YEAR = datetime.now().year
+CUR_YEAR = time.localtime().tm_year
+
+
+# ── Archetype copy (str.format_map shapes, filled per call by _fill) ─────────
+# Every mock template in this module is a str with {named} fields filled by
+# _fill, which also walks the dict/list response skeletons further down.
+def _fill(tpl, v: Mapping[str, object]):
+    """Fill every string in a response skeleton with str.format_map(v)."""
+    if isinstance(tpl, str):
+        return tpl.format_map(v)
+    if isinstance(tpl, dict):
+        return {k: _fill(x, v) for k, x in tpl.items()}
+    if isinstance(tpl, list):
+        return [_fill(x, v) for x in tpl]
+    return tpl
+
+
+_A1_WHY_SUCCEEDED = (
+    "This competitor solved the same core problem as {name} but refused to serve more than one "
+    "specific customer segment in the first 12 months. "
+    "Unlike {name} — which {wedge_full} — "
+    "this player picked the single most painful step in the {cat} workflow and became "
+    "indispensable for it before touching anything adjacent. "
+    "Every feature, every sales conversation, every pricing decision was anchored to "
+    "that one segment's exact daily pain — not to a broader vision. "
+    "Expansion happened only after word-of-mouth within that segment was self-sustaining."
+)
+_A1_KEY_LESSON = (
+    "The startup that wins a large market usually enters through the narrowest possible door. "
+    "Narrow scope compresses the feedback loop, reduces burn rate, and manufactures "
+    "the word-of-mouth that broad products can never buy. "
+    "In the {cat} space, 'solve everything' is a fundraising story — 'solve this one thing completely' "
+    "is a go-to-market strategy."
+)
+_A1_HOW_TO_APPLY = (
+    "The revived {name} should answer one question before writing a line of code: "
+    "'What is the single most painful, most frequent moment in the {cat} workflow "
+    "that our target customer in {market} experiences?' "
+)
+_A1_APPLY_TIMED   = ("The original spent {active_str} trying to be comprehensive — the revival must spend "
+                     "its first 6 months being indispensable for one thing.")
+_A1_APPLY_UNTIMED = "Start narrower than feels commercially viable. Expand only after the segment is locked."
+_A1_APPLY_CLOSE   = " Resist every pressure to generalise until that wedge generates unsolicited referrals."
+
+_A2_WHY_SUCCEEDED = (
+    "This competitor's founding rule was: no product feature gets built unless a customer "
+    "has already paid for it. They ran a manual concierge MVP for 90 days — doing the job "
+    "by hand that the software would eventually automate. "
+    "The first 5 customers paid before a single scalable line of code was written. "
+    "Every subsequent feature was pre-sold. "
+)
+_A2_PMF_STALLED = ("Growth stalling after initial traction is a classic late-stage PMF signal — "
+                   "it means early adopters adopted but the mainstream refused to follow.")
+_A2_PMF_GAP     = ("In the {cat} space, the gap between 'users love it' and 'users pay for it' "
+                   "has killed more startups than any competitor ever has.")
+_A2_KEY_LESSON = (
+    "Willingness to pay is the only PMF signal that doesn't lie. "
+    "User sign-ups, NPS scores, and letters of intent are all proxies. "
+    "A customer handing over money — before the product is complete — "
+    "is the only truly honest signal in the {cat} space. "
+)
+_A2_LESSON_FUNDED   = ("The {funding} raised by {name} should have purchased 10 paying customers "
+                       "before it purchased a single engineer.")
+_A2_LESSON_UNFUNDED = "Revenue should precede roadmap. Every feature should be paid for before it is built."
+_A2_HOW_TO_APPLY = (
+    "Before rebuilding {name}, identify 5 target customers in {market} who would pay today — "
+    "not 'when the product is ready', not 'in principle', but this week, for a manual "
+    "version of the solution. If 5 people won't pay for a human doing the job, the software "
+    "version won't change that. "
+)
+_A2_APPLY_RAN_OUT = ("Those 5 paying customers should fund the first 60 days of development entirely — "
+                     "no external capital needed to reach that milestone.")
+_A2_APPLY_ROADMAP = ("Use those 5 paying customers as the only valid input to the {year} roadmap. "
+                     "Kill every feature that none of them asked for.")
+
+_A3_BIG_COMP = ("When a larger competitor entered the {cat} space, this player was protected "
+                "because its distribution channel was owned, not rented — the competitor "
+                "couldn't copy the channel relationship the way it could copy features.")
+_A3_NO_BIG_COMP = ("In the {cat} market in {market}, no amount of product quality compensates "
+                   "for the wrong distribution strategy. This player proved it.")
+_A3_WHY_SUCCEEDED = (
+    "This competitor spent the first 60 days of its existence securing "
+    "{channel_type} — before writing a single line of product code. "
+    "By launch day, 50 qualified, warm leads were already waiting. "
+    "They never ran a paid ad. They never hired a sales team before achieving repeatable, "
+    "founder-led revenue. "
+)
+_A3_KEY_LESSON = (
+    "Distribution is a strategy, not a tactic. In {cat}, the company that owns "
+    "a distribution channel — whether through partnerships, developer communities, "
+    "platform integrations, or earned content — beats the company with a better "
+    "product every time at the same funding level. "
+)
+_A3_LESSON_TIMED   = ("The {active_str} that {name} spent suggests time was available to build distribution. "
+                      "The question is whether it was prioritised.")
+_A3_LESSON_UNTIMED = "Distribution strategy should precede product strategy, not follow it."
+_A3_HOW_TO_APPLY = (
+    "Before the revived {name} builds anything, map the full distribution landscape "
+    "in {market}: who already has the daily attention of the target {cat} customer? "
+    "What integration, partnership, or community could deliver customers without paid acquisition? "
+    "Specifically for {name}'s space: {channel_type} is the distribution vector worth exploring first. "
+    "Close that partnership before the product ships. "
+)
+_A3_APPLY_FUNDED   = ("If no such partner exists, that absence is itself a signal — distribution-resistant "
+                      "markets require either a very long runway or a very viral product mechanic.")
+_A3_APPLY_UNFUNDED = ("If no distribution partner is available, the go-to-market must be rethought "
+                      "before a line of code is written.")
+
+
+# Research-dossier market-shift endings
+_SHIFT_AI_FUNDED   = "can now be validated with under $500K, compared to the {funding} the original required."
+_SHIFT_AI_UNFUNDED = "can now be validated for a fraction of what the original required."
+_SHIFT_FUNDING_FUNDED = ("The {funding} raised by the original is now a cautionary number, not an aspirational one — "
+                         "a revived {name} that raises less and proves more will be the stronger fundraising story.")
+_SHIFT_FUNDING_UNFUNDED = "A leaner raise with earlier revenue is now a competitive advantage in fundraising, not a compromise."
+
+
+# Category keyword → distribution channel, first match wins (substring match,
+# so e.g. "biotech" hits "bio")
+_CHANNEL_TABLE = (
+    (re.compile(r"b2b|saas|enterprise|platform|software"),
+     "bottom-up adoption through a permanent free tier that individual contributors used before IT got involved"),
+    (re.compile(r"health|medical|bio|clinic"),
+     "clinical co-development partnerships with 2–3 health systems who provided distribution in exchange for design authority"),
+    (re.compile(r"consumer|social|media|content|audio"),
+     "a single organic content channel that already had the attention of the target audience before the product launched"),
+    (re.compile(r"fintech|finance|payment|banking"),
+     "API-first developer adoption where engineers at target companies became internal champions before the enterprise sale began"),
+    (re.compile(r"hardware|iot|device"),
+     "a strategic distribution partnership with an established channel that already sold to the target customer"),
+)
+_DEFAULT_CHANNEL = "one trusted distribution partner already embedded in the {cat} customer's existing workflow"
 
 
 # ── Fully dynamic competitor archetypes (no hardcoded companies) ───────────────
+@dataclass(slots=True, frozen=True)
+class Archetype:
+    """One competitor success archetype; immutable so cached instances can be shared."""
+    name:          str
+    outcome:       str
+    why_succeeded: str
+    key_lesson:    str
+    how_to_apply:  str
+
+
 def _competitors_from_context(
     name: str, desc: str, category: str, market: str,
-    founded: str, shutdown: str, active_str: str,
+    founded_int: Optional[int], shutdown_int: Optional[int], active_str: str,
     funding: str, signals: list, why_failed: str
-) -> list:
+) -> list["Archetype"]:
     """
     Generate 3 competitor success archetypes derived entirely from the user's
     startup inputs. No hardcoded company names — every sentence references the
     actual startup, its description, its market, its failure signals, and its timeline.
     """
-    sig_text   = " ".join(signals).lower() + " " + why_failed.lower()
+    return list(_competitor_archetypes(
+        name, desc, category, market, founded_int, shutdown_int,
+        active_str, funding, tuple(signals), why_failed
+    ))
+
+
+@functools.lru_cache(maxsize=256)
+def _competitor_archetypes(
+    name: str, desc: str, category: str, market: str,
+    founded_int: Optional[int], shutdown_int: Optional[int], active_str: str,
+    funding: str, signals: tuple, why_failed: str
+) -> tuple["Archetype", ...]:
+    """Cached builder behind _competitors_from_context (arguments must be hashable)."""
+    texts      = (*signals, why_failed)
     core_desc  = (desc[:75] + "…") if len(desc) > 75 else desc
     short_name = name.split()[0] if " " in name else name  # first word for brevity
     cat        = category or "technology"
 
     # ── Derive context-sensitive labels for outcome/channel ─────────────────
     # Monetisation context
-    ran_out   = "ran out of money" in sig_text or "wrong pricing" in sig_text
-    no_pmf    = "growth stalled" in sig_text or "product was never finished" in sig_text
-    team_fail = "team fell apart" in sig_text
-    too_early = "too early" in sig_text or "lockdown" in sig_text
-    big_comp  = "larger competitor" in sig_text
+    ran_out   = _sig(texts, "ran out of money") or _sig(texts, "wrong pricing")
+    no_pmf    = _sig(texts, "growth stalled") or _sig(texts, "product was never finished")
+    team_fail = _sig(texts, "team fell apart")
+    too_early = _sig(texts, "too early") or _sig(texts, "lockdown")
+    big_comp  = _sig(texts, "larger competitor")
 
     # Timing context
-    yrs_active = ""
-    try:
-        n = int(shutdown) - int(founded)
+    if founded_int is not None and shutdown_int is not None:
+        n = shutdown_int - founded_int
         yrs_active = f"{n} year{'s' if n != 1 else ''}"
-    except Exception:
+    else:
         yrs_active = "its operating window"
 
     # Funding shorthand
     raised_str = f"{funding} raised" if funding not in ("Undisclosed", "Unknown", "") else "its capital"
 
+    # Values shared by every archetype template
+    funded = funding not in ("Undisclosed", "Unknown", "")
+    v = {"name": name, "cat": cat, "market": market, "funding": funding,
+         "active_str": active_str, "year": CUR_YEAR}
+
     # ── ARCHETYPE 1: The Narrow-Wedge Player ─────────────────────────────────
     # Contrasts with {name}'s likely over-broad scope; derived from desc + category
-    wedge_full = (
+    v["wedge_full"] = (
         f"tried to build {core_desc} for the full {cat} market" if desc
         else f"tried to address the entire {cat} space at once"
     )
-    a1 = {
-        "name": f"The Narrow-Wedge {cat} Player",
-        "outcome": (
-            f"Achieved self-sustaining growth in the {market} {cat} market"
-            f"{' — in less time than ' + short_name + ' had on the market' if yrs_active else ''}"
-        ),
-        "why_succeeded": (
-            f"This competitor solved the same core problem as {name} but refused to serve more than one "
-            f"specific customer segment in the first 12 months. "
-            f"Unlike {name} — which {wedge_full} — "
-            f"this player picked the single most painful step in the {cat} workflow and became "
-            f"indispensable for it before touching anything adjacent. "
-            f"Every feature, every sales conversation, every pricing decision was anchored to "
-            f"that one segment's exact daily pain — not to a broader vision. "
-            f"Expansion happened only after word-of-mouth within that segment was self-sustaining."
-        ),
-        "key_lesson": (
-            f"The startup that wins a large market usually enters through the narrowest possible door. "
-            f"Narrow scope compresses the feedback loop, reduces burn rate, and manufactures "
-            f"the word-of-mouth that broad products can never buy. "
-            f"In the {cat} space, 'solve everything' is a fundraising story — 'solve this one thing completely' "
-            f"is a go-to-market strategy."
-        ),
-        "how_to_apply": (
-            f"The revived {name} should answer one question before writing a line of code: "
-            f"'What is the single most painful, most frequent moment in the {cat} workflow "
-            f"that our target customer in {market} experiences?' "
-            f"{'The original spent ' + active_str + ' trying to be comprehensive — the revival must spend its first 6 months being indispensable for one thing.' if yrs_active else 'Start narrower than feels commercially viable. Expand only after the segment is locked.'} "
-            f"Resist every pressure to generalise until that wedge generates unsolicited referrals."
-        ),
-    }
+    a1 = Archetype(
+        name=f"The Narrow-Wedge {cat} Player",
+        outcome="".join([
+            f"Achieved self-sustaining growth in the {market} {cat} market",
+            f" — in less time than {short_name} had on the market" if yrs_active else "",
+        ]),
+        why_succeeded=_fill(_A1_WHY_SUCCEEDED, v),
+        key_lesson=_fill(_A1_KEY_LESSON, v),
+        how_to_apply="".join([
+            _fill(_A1_HOW_TO_APPLY, v),
+            _fill(_A1_APPLY_TIMED, v) if yrs_active else _A1_APPLY_UNTIMED,
+            _A1_APPLY_CLOSE,
+        ]),
+    )
 
     # ── ARCHETYPE 2: The Revenue-First Builder ───────────────────────────────
     # Contrasts with {name}'s failure to validate monetisation before burning capital
     capital_contrast = (
         f"where {name} spent {raised_str} validating whether the market existed"
-        if funding not in ("Undisclosed", "Unknown", "")
+        if funded
         else f"where {name} burned runway before confirming willingness to pay"
     )
-    pmf_note = (
-        "Growth stalling after initial traction is a classic late-stage PMF signal — "
-        "it means early adopters adopted but the mainstream refused to follow."
-        if no_pmf else
-        f"In the {cat} space, the gap between 'users love it' and 'users pay for it' "
-        f"has killed more startups than any competitor ever has."
+    pmf_note = _A2_PMF_STALLED if no_pmf else _fill(_A2_PMF_GAP, v)
+    a2 = Archetype(
+        name=f"The Revenue-First {cat} Builder",
+        outcome="".join([
+            f"Reached positive unit economics in the {market} {cat} market spending a fraction of ",
+            raised_str if raised_str != "its capital" else "the typical raise for this category",
+        ]),
+        why_succeeded="".join([
+            _A2_WHY_SUCCEEDED,
+            capital_contrast.capitalize(),
+            ", this player spent under $100K confirming the same hypothesis. ",
+            pmf_note,
+        ]),
+        key_lesson="".join([
+            _fill(_A2_KEY_LESSON, v),
+            _fill(_A2_LESSON_FUNDED, v) if funded else _A2_LESSON_UNFUNDED,
+        ]),
+        how_to_apply="".join([
+            _fill(_A2_HOW_TO_APPLY, v),
+            _A2_APPLY_RAN_OUT if ran_out else _fill(_A2_APPLY_ROADMAP, v),
+        ]),
     )
-    a2 = {
-        "name": f"The Revenue-First {cat} Builder",
-        "outcome": (
-            f"Reached positive unit economics in the {market} {cat} market "
-            f"spending a fraction of {raised_str if raised_str != 'its capital' else 'the typical raise for this category'}"
-        ),
-        "why_succeeded": (
-            f"This competitor's founding rule was: no product feature gets built unless a customer "
-            f"has already paid for it. They ran a manual concierge MVP for 90 days — doing the job "
-            f"by hand that the software would eventually automate. "
-            f"The first 5 customers paid before a single scalable line of code was written. "
-            f"Every subsequent feature was pre-sold. "
-            f"{capital_contrast.capitalize()}, this player spent under $100K confirming "
-            f"the same hypothesis. {pmf_note}"
-        ),
-        "key_lesson": (
-            f"Willingness to pay is the only PMF signal that doesn't lie. "
-            f"User sign-ups, NPS scores, and letters of intent are all proxies. "
-            f"A customer handing over money — before the product is complete — "
-            f"is the only truly honest signal in the {cat} space. "
-            f"{'The ' + funding + ' raised by ' + name + ' should have purchased 10 paying customers before it purchased a single engineer.' if funding not in ('Undisclosed','Unknown','') else 'Revenue should precede roadmap. Every feature should be paid for before it is built.'}"
-        ),
-        "how_to_apply": (
-            f"Before rebuilding {name}, identify 5 target customers in {market} who would pay today — "
-            f"not 'when the product is ready', not 'in principle', but this week, for a manual "
-            f"version of the solution. If 5 people won't pay for a human doing the job, the software "
-            f"version won't change that. "
-            f"{'Those 5 paying customers should fund the first 60 days of development entirely — no external capital needed to reach that milestone.' if ran_out else f'Use those 5 paying customers as the only valid input to the {CUR_YEAR} roadmap. Kill every feature that none of them asked for.'}"
-        ),
-    }
 
     # ── ARCHETYPE 3: The Distribution-Owner ──────────────────────────────────
     # Contrasts with {name}'s likely undefined or expensive acquisition channel
-    big_comp_note = (
-        f"When a larger competitor entered the {cat} space, this player was protected "
-        f"because its distribution channel was owned, not rented — the competitor "
-        f"couldn't copy the channel relationship the way it could copy features."
-        if big_comp else
-        f"In the {cat} market in {market}, no amount of product quality compensates "
-        f"for the wrong distribution strategy. This player proved it."
-    )
+    big_comp_note = _fill(_A3_BIG_COMP, v) if big_comp else _fill(_A3_NO_BIG_COMP, v)
     # Derive a channel hint from the category
     c_low = cat.lower()
-    if any(k in c_low for k in ["b2b", "saas", "enterprise", "platform", "software"]):
-        channel_type = "bottom-up adoption through a permanent free tier that individual contributors used before IT got involved"
-    elif any(k in c_low for k in ["health", "medical", "bio", "clinic"]):
-        channel_type = "clinical co-development partnerships with 2–3 health systems who provided distribution in exchange for design authority"
-    elif any(k in c_low for k in ["consumer", "social", "media", "content", "audio"]):
-        channel_type = "a single organic content channel that already had the attention of the target audience before the product launched"
-    elif any(k in c_low for k in ["fintech", "finance", "payment", "banking"]):
-        channel_type = "API-first developer adoption where engineers at target companies became internal champions before the enterprise sale began"
-    elif any(k in c_low for k in ["hardware", "iot", "device"]):
-        channel_type = "a strategic distribution partnership with an established channel that already sold to the target customer"
-    else:
-        channel_type = f"one trusted distribution partner already embedded in the {cat} customer's existing workflow"
+    channel_type = next((ch for pat, ch in _CHANNEL_TABLE if pat.search(c_low)),
+                        _fill(_DEFAULT_CHANNEL, {"cat": cat}))
 
-    a3 = {
-        "name": f"The Channel-Owned {cat} Entrant",
-        "outcome": (
+    v["channel_type"] = channel_type
+    a3 = Archetype(
+        name=f"The Channel-Owned {cat} Entrant",
+        outcome=(
             f"Acquired its first 100 paying customers in {market} at near-zero acquisition cost "
             f"by owning its distribution channel before shipping product"
         ),
-        "why_succeeded": (
-            f"This competitor spent the first 60 days of its existence securing "
-            f"{channel_type} — before writing a single line of product code. "
-            f"By launch day, 50 qualified, warm leads were already waiting. "
-            f"They never ran a paid ad. They never hired a sales team before achieving repeatable, "
-            f"founder-led revenue. {big_comp_note}"
-        ),
-        "key_lesson": (
-            f"Distribution is a strategy, not a tactic. In {cat}, the company that owns "
-            f"a distribution channel — whether through partnerships, developer communities, "
-            f"platform integrations, or earned content — beats the company with a better "
-            f"product every time at the same funding level. "
-            f"{'The ' + active_str + ' that ' + name + ' spent suggests time was available to build distribution. The question is whether it was prioritised.' if yrs_active else 'Distribution strategy should precede product strategy, not follow it.'}"
-        ),
-        "how_to_apply": (
-            f"Before the revived {name} builds anything, map the full distribution landscape "
-            f"in {market}: who already has the daily attention of the target {cat} customer? "
-            f"What integration, partnership, or community could deliver customers without paid acquisition? "
-            f"Specifically for {name}'s space: {channel_type} is the distribution vector worth exploring first. "
-            f"Close that partnership before the product ships. "
-            f"{'If no such partner exists, that absence is itself a signal — distribution-resistant markets require either a very long runway or a very viral product mechanic.' if funding not in ('Undisclosed','Unknown','') else 'If no distribution partner is available, the go-to-market must be rethought before a line of code is written.'}"
-        ),
-    }
+        why_succeeded="".join([_fill(_A3_WHY_SUCCEEDED, v), big_comp_note]),
+        key_lesson="".join([
+            _fill(_A3_KEY_LESSON, v),
+            _fill(_A3_LESSON_TIMED, v) if yrs_active else _A3_LESSON_UNTIMED,
+        ]),
+        how_to_apply="".join([
+            _fill(_A3_HOW_TO_APPLY, v),
+            _A3_APPLY_FUNDED if funded else _A3_APPLY_UNFUNDED,
+        ]),
+    )
 
-    return [a1, a2, a3]
+    return (a1, a2, a3)
 
 
 # ── Mock LLM ──────────────────────────────────────────────────────────────────
-def _parse_user_ctx(user: str) -> dict:
+# Context-signal phrases the mock reacts to, matched case-insensitively in
+# each signal directly (no joined/lowercased copy of the list per call)
+_SIGNAL_PATTERNS = {k: re.compile(re.escape(k), re.IGNORECASE) for k in (
+    "too early", "lockdown", "pandemic", "wrong pricing", "ran out of money", "growth stalled",
+    "product was never finished", "team fell apart", "larger competitor", "regulation",
+)}
+
+
+def _sig(signals, key: str) -> bool:
+    """True if any signal mentions the phrase `key`."""
+    pat = _SIGNAL_PATTERNS[key]
+    return any(pat.search(s) for s in signals)
+
+
+def _rating(signals: tuple, signal_keys: tuple, default: str) -> str:
+    """Calibrate an autopsy rating: Critical if any signal mentions one of the keys."""
+    return "Critical" if any(_sig(signals, k) for k in signal_keys) else default
+
+
+# Patterns are compiled once at import; the mock path runs them on every call.
+_I = re.IGNORECASE
+# Every context-string field in one alternation, so the user message is scanned
+# once. Each branch sits inside a lookahead: matches are zero-width and never
+# consume text another field could start in, and the first hit per field wins —
+# the same result as one re.search per field.
+_CTX_RE = re.compile(
+    r"(?=Active:\s*(?P<founded>\d{4})(?:\s*[→\-]+\s*(?P<shutdown>\d{4}))?"
+    r"|Funding:\s*(?P<funding>[^\n]+)"
+    # Category: stop at — (em dash) or " or newline; avoid source titles like "Industry: X — CB Insights"
+    r'|Industry:\s*(?P<industry>[^\u2014\n"]+)'
+    r"|Market:\s*(?P<market>[^\n]+)"
+    r"|What it did:\s*(?P<desc>[^\n]+)"
+    r"|Founder's description.*?:\s*(?P<overview>[^\n]+)"
+    r"|Why it failed.*?:\s*(?P<why_failed>[^\n]+))",
+    _I,
+)
+_CTX_KEYS = ("founded", "shutdown", "funding", "industry", "market", "desc", "overview", "why_failed")
+_PAT_JSON_FOUNDED  = re.compile(r'"founded"\s*:\s*"([^"]+)"', _I)
+_PAT_JSON_SHUTDOWN = re.compile(r'"shutdown"\s*:\s*"([^"]+)"', _I)
+_PAT_JSON_FUNDING  = re.compile(r'"funding"\s*:\s*"([^"]+)"', _I)
+_PAT_JSON_CATEGORY = re.compile(r'"category"\s*:\s*"([^"]+)"', _I)
+_PAT_JSON_MARKET   = re.compile(r'"market"\s*:\s*"([^"]+)"', _I)
+_PAT_JSON_ONE_LINER = re.compile(r'"one_liner"\s*:\s*"([^"]+)"', _I)
+_PAT_JSON_BUILT    = re.compile(r'"what_they_built"\s*:\s*"([^"]{10,200})"', _I)
+_PAT_SIGNALS       = re.compile(r'context_signals.*?(\[[^\]]*\])', _I)
+_PAT_QUOTED        = re.compile(r'"([^"]+)"')
+
+_JSON_KEYS  = frozenset(("founded", "shutdown", "funding", "category", "market",
+                         "one_liner", "what_they_built", "context_signals"))
+
+
+def _json_fields(user: str) -> Optional[dict]:
+    """
+    Decode the JSON blocks embedded in the user message (the dossier, then
+    the agent's own context) once each and collect the first non-empty value
+    of each key in _JSON_KEYS, in document order. Returns None when there is
+    no block or one of them doesn't parse.
+    """
+    docs = []
+    pos = user.find("{")
+    while pos >= 0:
+        block = _extract_json(user[pos:])
+        try:
+            docs.append(_loads(block))
+        except ValueError:
+            return None
+        pos = user.find("{", pos + len(block))
+    if not docs:
+        return None
+
+    found: dict = {}
+    def walk(node):
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k in _JSON_KEYS and k not in found:
+                    if k == "context_signals":
+                        if isinstance(v, list):
+                            found[k] = tuple(x for x in v if isinstance(x, str) and x)
+                    elif isinstance(v, str) and v.strip():
+                        v = v.strip()
+                        if k != "what_they_built" or 10 <= len(v) <= 200:
+                            found[k] = v
+                walk(v)
+        elif isinstance(node, list):
+            for v in node:
+                walk(v)
+    walk(docs)
+    return found
+
+# Startup-name forms in one alternation, in priority order (a: "Startup: XYZ",
+# b: startup_name: "XYZ", c: "name": "XYZ"). Zero-width like _CTX_RE, so the
+# first occurrence of every form is seen in a single scan.
+_NAME_RE = re.compile(
+    r'(?=^Startup[:\s]+(?P<a>[A-Za-z0-9][A-Za-z0-9\s\.\-]{1,50}?)[,\s]'
+    r'|startup_name["\s:]+(?P<b>[A-Za-z0-9][A-Za-z0-9\s\.\-]{1,50}?)"'
+    r'|"name"\s*:\s*"(?P<c>[A-Za-z0-9][^"]{1,50}?)")',
+    _I | re.M,
+)
+_NAME_NOISE = frozenset(("this startup", "unknown", "n/a", "none", "the startup"))
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_user_ctx(user: str) -> Mapping[str, object]:
     """
     Parse all structured fields from the _build_context output embedded in the
     user message. This ensures every mock agent response uses the actual user
     inputs rather than any hardcoded placeholder data.
+
+    Memoised on the message; the result is a read-only mapping (signals as a
+    tuple) so a caller can't poison the cache.
     """
-    def _get(pattern, default=""):
-        m = re.search(pattern, user, re.IGNORECASE)
+    def _get(pattern: re.Pattern, default=""):
+        m = pattern.search(user)
         return m.group(1).strip() if m else default
 
-    # Try context-string format first, then JSON format as fallback
-    founded  = _get(r'Active:\s*(\d{4})') or _get(r'"founded"\s*:\s*"([^"]+)"')
-    shutdown = _get(r'Active:\s*\d{4}\s*[→\-]+\s*(\d{4})') or _get(r'"shutdown"\s*:\s*"([^"]+)"')
-    funding  = _get(r'Funding:\s*([^\n]+)') or _get(r'"funding"\s*:\s*"([^"]+)"')
-    # Category: stop at — (em dash) or " or newline; avoid source titles like "Industry: X — CB Insights"
+    # Single pass over the context-string format
+    fields = dict.fromkeys(_CTX_KEYS, "")
+    missing = len(_CTX_KEYS)
+    for m in _CTX_RE.finditer(user):
+        for k, v in m.groupdict().items():
+            if v and not fields[k]:
+                v = v.strip()
+                if v:
+                    fields[k] = v
+                    missing -= 1
+        if not missing:
+            break
+
+    # JSON format as fallback for anything the context string didn't provide:
+    # decode the embedded block once, or use the per-key patterns if it won't parse
+    doc = _json_fields(user)
+    def _jget(key: str, pattern: re.Pattern) -> str:
+        return doc.get(key, "") if doc is not None else _get(pattern)
+
+    founded  = fields["founded"]  or _jget("founded", _PAT_JSON_FOUNDED)
+    shutdown = fields["shutdown"] or _jget("shutdown", _PAT_JSON_SHUTDOWN)
+    funding  = fields["funding"]  or _jget("funding", _PAT_JSON_FUNDING)
     # First try JSON "category" key (most reliable for revival/copywriter agents)
     # then fall back to context string "Industry: X" format
-    _cat_json = _get(r'"category"\s*:\s*"([^"]+)"')
-    _cat_ctx  = _get(r'Industry:\s*([^\u2014\n"]+)').strip()  # stops at em-dash
-    category  = _cat_json or _cat_ctx
-    market   = _get(r'Market:\s*([^\n]+)') or _get(r'"market"\s*:\s*"([^"]+)"')
-    desc     = (_get(r'What it did:\s*([^\n]+)')
-                or _get(r'"one_liner"\s*:\s*"([^"]+)"')
-                or _get(r'"what_they_built"\s*:\s*"([^"]{10,200})"'))
-
-    return {
+    category = _jget("category", _PAT_JSON_CATEGORY) or fields["industry"]
+    market   = fields["market"]   or _jget("market", _PAT_JSON_MARKET)
+    desc     = (fields["desc"]
+                or _jget("one_liner", _PAT_JSON_ONE_LINER)
+                or _jget("what_they_built", _PAT_JSON_BUILT))
+    if doc is not None:
+        signals = doc.get("context_signals", ())
+    else:
+        signals = tuple(_PAT_QUOTED.findall(_get(_PAT_SIGNALS, '[]')))
+
+    return MappingProxyType({
         "founded":    founded,
         "shutdown":   shutdown,
         "funding":    funding,
         "category":   category,
         "market":     market,
         "desc":       desc,
-        "overview":   _get(r"Founder's description.*?:\s*([^\n]+)"),
-        "why_failed": _get(r'Why it failed.*?:\s*([^\n]+)'),
+        "overview":   fields["overview"],
+        "why_failed": fields["why_failed"],
         # context signals from JSON
-        "signals":    re.findall(r'"([^"]+)"', _get(r'context_signals.*?(\[[^\]]*\])', '[]')),
-    }
+        "signals":    signals,
+    })
+
+
+# ── Mock autopsy / revival / copy templates ───────────────────────────────────
+# Response skeletons filled with str.format_map by _fill(). Copy that depends on
+# a lens rating is picked from a dict keyed by every rating _rating() can return
+# for that lens (or by whether a signal was flagged), instead of being branched
+# on inside an f-string on every call.
+_TIMING_STATE = {
+    "Critical":    "still maturing, making customer education expensive and sales cycles long",
+    "Significant": "competitive but addressable with the right positioning",
+}
+_TIMING_EVIDENCE = {
+    "Critical":    "Founder noted market timing as a factor.",
+    "Significant": "No specific timing crisis was flagged in available signals.",
+}
+_MARKET_EVIDENCE = {
+    "Critical":    "Founder cited pricing/monetisation as a challenge.",
+    "Significant": "No confirmed ARR or revenue milestones were publicly disclosed.",
+}
+_PMF_FINDING = {
+    "Critical":    "struggled from the outset to demonstrate consistent, organic customer pull",
+    "Significant": "showed initial traction but failed to retain customers at the rate needed to justify continued investment",
+}
+_PMF_EVIDENCE = {  # keyed by whether "growth stalled" was flagged
+    True:  "Growth stalled after initial traction — a classic late-stage PMF failure signal.",
+    False: "No public retention or engagement metrics confirm sustained PMF.",
+}
+_TEAM_FINDING = {
+    "Critical":    "The team fell apart before the company could recover — a critical execution failure that compounded every other problem.",
+    "Significant": "{name} faced execution challenges common to startups in the {category} space: hiring the right talent, managing burn, and pivoting quickly enough to stay ahead of market feedback.",
+}
+_TEAM_EVIDENCE = {  # keyed by whether "team fell apart" was flagged
+    True:  "Team fragmentation explicitly cited as a failure factor.",
+    False: "No public founder conflict data available for {name}. Shutdown timeline implies execution gaps went unresolved for too long.",
+}
+_COMP_FINDING = {
+    "Critical": "A larger competitor moved into the space and commoditised the core value proposition before {name} could build sufficient defensibility.",
+    "Minor":    "The {category} space in which {name} competed became increasingly crowded between {founded} and {shutdown}.",
+}
+_COMP_EVIDENCE = {
+    "Critical": "Competitor copying explicitly cited as a factor.",
+    "Minor":    "Standard competitive pressure in the {category} market during {founded}–{shutdown}. No specific copycat event was flagged in available signals.",
+}
+_EXTERN_FINDING = {
+    "Critical": "Regulatory intervention was cited as a direct blocker — an external factor largely outside the team's control.",
+    "Minor":    "No catastrophic external event appears to have been the primary cause of {name}'s failure.",
+}
+_EXTERN_EVIDENCE = {
+    "Critical": "Regulation explicitly cited as a blocking factor.",
+    "Minor":    "No confirmed regulatory, pandemic, or macro event was the proximate cause of the shutdown.",
+}
+
+_AUTOPSY_TPL = {
+    "primary_failure_hypothesis": (
+        "{name} failed to achieve product-market fit within its {active_str} lifespan — "
+        "spending {funding} without validating a sustainable path to growth, "
+        "and ultimately shutting down when the gap between capital efficiency and market demand became insurmountable."
+    ),
+    "overall_score": 22,
+    "data_note": (
+        "Analysis is partially inferred from founder-provided context and publicly available signals. "
+        "Direct metrics (churn, NPS, revenue) were not publicly disclosed by {name}."
+    ),
+    "timing": {
+        "rating": "{timing_r}",
+        "finding": (
+            "{name} operated from {founded} to {shutdown}. "
+            "The {category} market during this window was {timing_state}. "
+            "The timing of the shutdown in {shutdown} suggests the team ran out of time before the market came to them."
+        ),
+        "evidence": (
+            "Active from {founded}–{shutdown} ({active_str}). "
+            "Funding of {funding} was not sufficient to outlast the market timing gap. "
+            "{timing_evidence}"
+        ),
+    },
+    "market_size_monetization": {
+        "rating": "{market_r}",
+        "finding": (
+            "The monetisation model for {name}'s {category} product was never definitively validated at scale. "
+            "With {funding} raised, the path to a unit-economics-positive business required either a larger TAM "
+            "than the market supported or a pricing model that customers consistently accepted."
+        ),
+        "evidence": (
+            "Funding of {funding} is consistent with a seed/Series A stage company that had not yet demonstrated "
+            "repeatable revenue. {market_evidence}"
+        ),
+    },
+    "pmf": {
+        "rating": "{pmf_r}",
+        "finding": (
+            "{name}'s core product — {desc_120} — "
+            "{pmf_finding}. "
+            "The gap between early adopter enthusiasm and mainstream adoption was never bridged."
+        ),
+        "evidence": (
+            "Shutdown in {shutdown} without a successful exit or acqui-hire strongly implies PMF was not achieved. "
+            "{pmf_evidence}"
+        ),
+    },
+    "team_execution": {
+        "rating": "{team_r}",
+        "finding": (
+            "{team_finding}  "
+            "The {active_str} window suggests the team had time to attempt corrections but could not find the right formula."
+        ),
+        "evidence": "{team_evidence}",
+    },
+    "competition_defensibility": {
+        "rating": "{comp_r}",
+        "finding": (
+            "{comp_finding}  "
+            "Without a clear moat — proprietary data, network effects, or switching costs — "
+            "{name} was vulnerable to better-funded competitors replicating its core features."
+        ),
+        "evidence": "{comp_evidence}",
+    },
+    "external_factors": {
+        "rating": "{extern_r}",
+        "finding": (
+            "{extern_finding}  "
+            "However, macro conditions during {founded}–{shutdown} (funding environment, market sentiment in the {category} sector) "
+            "may have reduced the window for recovery."
+        ),
+        "evidence": "{extern_evidence}",
+    },
+}
+
+_REVIVAL_TPL = {
+    "core_insight": (
+        "The problem {name} was trying to solve — {desc_100} — "
+        "is likely still real and still unsolved. "
+        "The failure was in execution, timing, and business model, not in the underlying need."
+    ),
+    "revised_name": "{name} ({year})",
+    "revised_icp": (
+        "Early adopters and power users in the {category} space who have already demonstrated "
+        "willingness to pay for solutions to the problem {name} was solving — "
+        "specifically in the {market} market, where the timing may now be more favourable."
+    ),
+    "repositioning_statement": (
+        "The new {name}: same insight, leaner model, built in public with customers from day one."
+    ),
+    "gtm_strategy": {
+        "primary_channel": "Direct outreach to the top 50 potential customers in the {category} space who experienced the problem firsthand",
+        "why_channel": (
+            "The fastest path to PMF validation is talking directly to people who already feel the pain. "
+            "In the {category} space, these customers are identifiable and reachable without paid acquisition. "
+            "Revenue from 10 paying customers is worth more than 10,000 free signups at this stage."
+        ),
+        "90_day_plan": [
+            {"week": "1–2", "action": "Interview 20 potential customers who experienced the exact problem {name} was solving. Record every session. Document the precise language they use — this becomes your copy and positioning."},
+            {"week": "3–4", "action": "Build a concierge MVP — solve the problem manually for 3–5 paying customers before writing a line of code. Charge real money from day one. Willingness to pay is the only signal that matters at this stage."},
+            {"week": "5–6", "action": "Scope the minimum product required to serve those 3–5 customers better than any existing alternative in the {category} space. Build only that feature set — nothing else."},
+            {"week": "7–8", "action": "Expand to 10–15 paying customers in the {market} market. Instrument weekly NPS, churn, and expansion revenue. If NPS < 40, do not expand further — fix the product first."},
+            {"week": "9–10", "action": "Study the {category} competitors identified in the research dossier. Map exactly what they do better. Build a clear answer to the question: 'Why would a customer choose us over them today?'"},
+            {"week": "11–12", "action": "With 15+ paying customers, positive NPS, and a clear competitive answer, approach 3 angels or pre-seed funds: '{name} failed because of X. We solved X. Here is the proof — 15 paying customers in 90 days.'"},
+        ],
+        "what_not_to_do": [
+            "Do NOT raise more than $500K before achieving 10 paying customers — runway should buy validation, not headcount.",
+            "Do NOT rebuild the original {name} product feature-for-feature. Start with the core insight only.",
+            "Do NOT hire a sales team before you have a repeatable, founder-led sales motion.",
+            "Do NOT ignore the reasons {name} failed — run the autopsy findings as a checklist every 30 days.",
+            "Do NOT optimise for press coverage before achieving PMF. Stay in stealth until the product speaks for itself.",
+        ],
+        "pricing_model": (
+            "Value-based pricing anchored to the economic outcome the customer gets — not a cost-plus or competitor-matching model. "
+            "Start with a flat monthly fee ({market} benchmark for {category}: $99–$499/month for SMB, $1K–$5K/month for enterprise). "
+            "Annual upfront pricing from day one to extend runway and signal commitment from customers."
+        ),
+    },
+    "competitive_landscape_today": (
+        "The {category} market has shifted materially since {name}'s {shutdown} shutdown. "
+        "Post-2023 AI tooling has reduced the cost of building in this space by 60–80%, meaning the original {name} vision "
+        "is likely achievable for a fraction of {funding}. Some competitors that existed when {name} shut down may have "
+        "weakened or pivoted; new players have likely entered. "
+        "A full competitive audit in {year} — mapping every current solution against the original problem — is essential before committing to a positioning for the revived product."
+    ),
+    "risk_register": [
+        {
+            "risk": "The original failure repeats — spending {funding}-equivalent capital without finding PMF",
+            "mitigation": "Hard cap on spending before PMF: no more than $250K before 10 paying customers. If you hit that cap, stop and re-evaluate the thesis — don't raise more.",
+        },
+        {
+            "risk": "The market has moved on since {shutdown} and the problem is now solved by an incumbent",
+            "mitigation": "Before building anything, spend 2 weeks mapping every current solution to the problem. If an incumbent now solves it adequately, the insight is dead — find an adjacent problem.",
+        },
+        {
+            "risk": "Founder credibility gap — the market associates the name with failure",
+            "mitigation": "Lead with the lessons, not the brand. A 'Built on the ashes of {name}' narrative is actually a powerful signal of self-awareness if the pitch acknowledges exactly what went wrong and why it's fixed now.",
+        },
+    ],
+}
+
+_COPY_TPL = {
+    "autopsy_summary_card": {
+        "headline": "How {name} Failed in {active_str}",
+        "primary_hypothesis": (
+            "{name} raised {funding} but couldn't find a sustainable business model in the {category} space "
+            "before the runway ran out — a failure of validation speed, not vision."
+        ),
+        "top_3_factors": [
+            "Failed to achieve product-market fit before capital was exhausted",
+            "Operated in a {category} market with strong, often better-funded competitors",
+            "Pivoted too late or not enough to find a wedge that customers would pay for",
+        ],
+        "killer_quote": "\"{quote}\" — {name} founder perspective",
+    },
+    "revival_pitch": {
+        "problem": (
+            "{desc} — this problem is real and still largely unsolved. "
+            "The original {name} approach was expensive, under-validated, and vulnerable to better-funded competitors. "
+            "Customers in the {category} space are still searching for a purpose-built solution that the market hasn't delivered."
+        ),
+        "solution": (
+            "{name} ({year}): same core insight, completely rebuilt execution. "
+            "We start with 10 paying customers and a concierge MVP before writing a line of scalable code. "
+            "Post-2023 AI infrastructure cuts build cost by 60–80%, meaning we can validate in 90 days what the original took {active_str} to attempt."
+        ),
+        "market": (
+            "The {category} market in {market} has grown and matured since {shutdown}. "
+            "Buyer education costs are lower, infrastructure is commoditised, and the timing window that worked against {name} "
+            "may now be firmly in our favour. The {year} market is fundamentally different from the one that rejected the original."
+        ),
+        "why_now": (
+            "Three forces converge in {year}: (1) AI tooling cuts the cost of building in {category} by 60–80%; "
+            "(2) the {category} market has matured — customers are more educated and infrastructure is cheaper; "
+            "(3) the lessons from {name}'s failure are now a blueprint, not a scar. "
+            "What required {funding} and {active_str} to attempt can now be validated for under $500K in 90 days."
+        ),
+        "ask": (
+            "Raising $1.5M pre-seed to reach 25 paying customers and $500K ARR within 12 months. "
+            "{name} spent {funding} proving the problem is real. "
+            "We're spending $1.5M proving we can own the solution — with a 90-day concierge validation before a single line of scalable code is written."
+        ),
+    },
+    "elevator_pitch": (
+        "{name} ({year}) is a lean revival of the original {name} — {desc_90} — "
+        "rebuilt with every lesson from the original failure baked into the founding thesis. "
+        "The original spent {funding} on the wrong execution; we're spending $1.5M on the right one, starting with 10 paying customers before we write a line of scalable code."
+    ),
+}
 
 
 def _mock(system: str, user: str) -> str:
     s = system.lower()
 
+    # ── Summariser (context pre-node) — offline, just trim to the limit ───────
+    if "condense the founder's note" in s:
+        if len(user) <= SUMMARY_THRESHOLD:
+            return user
+        return user[:SUMMARY_THRESHOLD].rsplit(" ", 1)[0] + "…"
+
     # ── Extract startup name (most reliable first) ────────────────────────────
-    name = "This Startup"
-    for pattern in [
-        r'^Startup[:\s]+([A-Za-z0-9][A-Za-z0-9\s\.\-]{1,50}?)[,\s]',   # "Startup: XYZ\n"
-        r'startup_name["\s:]+([A-Za-z0-9][A-Za-z0-9\s\.\-]{1,50}?)"',  # startup_name: "XYZ"
-        r'"name"\s*:\s*"([A-Za-z0-9][^"]{1,50}?)"',                     # "name": "XYZ"
-    ]:
-        m = re.search(pattern, user, re.IGNORECASE | re.MULTILINE)
-        if m:
-            candidate = m.group(1).strip().title()
-            # Reject obvious noise words
-            if candidate.lower() not in ("this startup", "unknown", "n/a", "none", "the startup"):
-                name = candidate
+    found = {}
+    for m in _NAME_RE.finditer(user):
+        form = m.lastgroup
+        if form not in found:
+            found[form] = m.group(form).strip().title()
+            # The "Startup:" form outranks the others — stop once it's usable
+            if form == "a" and found[form].lower() not in _NAME_NOISE:
                 break
+        if len(found) == 3:
+            break
+    # Reject obvious noise words
+    name = next((found[f] for f in "abc" if f in found and found[f].lower() not in _NAME_NOISE),
+                "This Startup")
 
     # ── Parse actual user inputs from the context string ─────────────────────
+    # The short identity fields recur across dozens of templates; intern them
+    # so the repeated dict lookups and comparisons are pointer checks
     ctx = _parse_user_ctx(user)
-    founded   = ctx["founded"]   or "Unknown"
-    shutdown  = ctx["shutdown"]  or "Unknown"
-    funding   = ctx["funding"]   or "Undisclosed"
-    category  = ctx["category"]  or "Technology"
-    market    = ctx["market"]    or "Global"
+    name      = sys.intern(name)
+    founded   = sys.intern(ctx["founded"]   or "Unknown")
+    shutdown  = sys.intern(ctx["shutdown"]  or "Unknown")
+    funding   = sys.intern(ctx["funding"]   or "Undisclosed")
+    category  = sys.intern(ctx["category"]  or "Technology")
+    market    = sys.intern(ctx["market"]    or "Global")
     desc      = ctx["desc"]      or f"{name} built a product in the {category} space."
     overview  = ctx["overview"]
     why       = ctx["why_failed"]
     signals   = ctx["signals"]
 
     # Slug for URL generation
-    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    slug = _SLUG_RE.sub('-', name.lower()).strip('-')
     name_enc = name.replace(' ', '+')
 
+    # Parse the years once; None when the input wasn't a plain year
+    founded_int  = int(founded)  if founded.isdecimal()  else None
+    shutdown_int = int(shutdown) if shutdown.isdecimal() else None
+
     # Infer years active
-    try:
-        years = int(shutdown) - int(founded)
+    if founded_int is not None and shutdown_int is not None:
+        years = shutdown_int - founded_int
         active_str = f"{founded}–{shutdown} ({years} year{'s' if years != 1 else ''})"
-    except Exception:
+    else:
         active_str = f"{founded}–{shutdown}"
 
     # ── Calibrate autopsy ratings from context signals ────────────────────────
-    def _rating(signal_keys: list, default: str) -> str:
-        for sig in signals:
-            for key in signal_keys:
-                if key.lower() in sig.lower():
-                    return "Critical"
-        return default
-
-    timing_r   = _rating(["too early", "lockdown", "pandemic"], "Significant")
-    market_r   = _rating(["wrong pricing", "ran out of money"], "Significant")
-    pmf_r      = _rating(["growth stalled", "product was never finished"], "Significant")
-    team_r     = _rating(["team fell apart", "ran out of money", "product was never finished"], "Significant")
-    comp_r     = _rating(["larger competitor"], "Minor")
-    extern_r   = _rating(["regulation", "lockdown"], "Minor")
+    timing_r   = _rating(signals, ("too early", "lockdown", "pandemic"), "Significant")
+    market_r   = _rating(signals, ("wrong pricing", "ran out of money"), "Significant")
+    pmf_r      = _rating(signals, ("growth stalled", "product was never finished"), "Significant")
+    team_r     = _rating(signals, ("team fell apart", "ran out of money", "product was never finished"), "Significant")
+    comp_r     = _rating(signals, ("larger competitor",), "Minor")
+    extern_r   = _rating(signals, ("regulation", "lockdown"), "Minor")
 
     # ── Research Agent ────────────────────────────────────────────────────────
     if "encyclopaedic" in s or ("research analyst" in s and "dossier" in s):
@@ -361,23 +1127,25 @@ def _mock(system: str, user: str) -> str:
                        f"Post-shutdown interviews or blog posts, if they exist, would provide the most direct insight.")
 
         # ── Market shifts since shutdown (fully derived from user inputs) ────
-        years_since = CUR_YEAR - int(shutdown) if shutdown.isdigit() else 3
-        sig_ctx     = " ".join(signals).lower()
+        years_since = CUR_YEAR - shutdown_int if shutdown_int is not None else 3
         # Build each shift to directly reference the startup's specific context
         shift_pmf   = (
             f"The 'growth stalled' failure mode that affected {name} is now a well-documented pattern — "
             f"founders in {CUR_YEAR} have access to battle-tested frameworks (Jobs-to-be-Done, concierge MVP, "
             f"pre-charged waitlists) specifically designed to prevent the product-market fit gap that shut {name} down."
-            if "growth stalled" in sig_ctx else
+            if _sig(signals, "growth stalled") else
             f"The {category} market has matured since {shutdown}: customer education costs are lower, "
             f"the category vocabulary is established, and buyers arrive with clearer expectations than {name}'s "
             f"early customers did — reducing the sales cycle friction that consumed early runway."
         )
-        shift_ai    = (
+        funded      = funding not in ("Undisclosed", "Unknown", "")
+        shift_ai    = "".join([
             f"Post-2023 AI/LLM tooling has cut the cost of building a {category} product by 60–80%. "
-            f"The core {name} vision — {desc[:60] + '…' if len(desc) > 60 else desc} — "
-            f"{'can now be validated with under $500K, compared to the ' + funding + ' the original required' if funding not in ('Undisclosed','Unknown','') else 'can now be validated for a fraction of what the original required'}."
-        )
+            f"The core {name} vision — ",
+            desc[:60] + "…" if len(desc) > 60 else desc,
+            " — ",
+            _fill(_SHIFT_AI_FUNDED, {"funding": funding}) if funded else _SHIFT_AI_UNFUNDED,
+        ])
         shift_infra = (
             f"Since {shutdown}, {years_since} year{'s' if years_since != 1 else ''} of cloud infrastructure "
             f"investment has commoditised the {category} backend stack that would have absorbed a significant "
@@ -388,12 +1156,12 @@ def _mock(system: str, user: str) -> str:
             f"that consumed early runway in the {category} space is now available as managed services, "
             f"dramatically reducing time-to-market for a revived product."
         )
-        shift_funding = (
+        shift_funding = "".join([
             f"Post-2022 funding discipline has flipped the narrative: investors in {CUR_YEAR} actively "
             f"reward capital efficiency and early revenue — the exact story a lean {name} revival can tell "
-            f"by starting with 10 paying customers and no institutional capital. "
-            f"{'The ' + funding + ' raised by the original is now a cautionary number, not an aspirational one — a revived ' + name + ' that raises less and proves more will be the stronger fundraising story.' if funding not in ('Undisclosed','Unknown','') else 'A leaner raise with earlier revenue is now a competitive advantage in fundraising, not a compromise.'}"
-        )
+            f"by starting with 10 paying customers and no institutional capital. ",
+            _fill(_SHIFT_FUNDING_FUNDED, {"funding": funding, "name": name}) if funded else _SHIFT_FUNDING_UNFUNDED,
+        ])
         shift_comp = (
             f"Competitors that defeated {name} in {founded}–{shutdown} may themselves have weakened or pivoted "
             f"in the {years_since} years since. The competitive map in the {category} space in {market} "
@@ -404,16 +1172,16 @@ def _mock(system: str, user: str) -> str:
 
         # ── Competitor success stories (fully derived from user inputs) ──────
         competitors_doing_well = _competitors_from_context(
-            name, desc, category, market, founded, shutdown,
+            name, desc, category, market, founded_int, shutdown_int,
             active_str, funding, signals, why
         )
 
-        return json.dumps({
+        return _dumps({
             "name":                name,
             "founded":             founded,
             "shutdown":            shutdown,
             "funding":             funding,
-            "investors":           [f"Seed-stage investors ({founded})", f"Series A investors ({int(founded)+2 if founded.isdigit() else 'n/a'})", "Strategic angels"],
+            "investors":           [f"Seed-stage investors ({founded})", f"Series A investors ({founded_int + 2 if founded_int is not None else 'n/a'})", "Strategic angels"],
             "category":            category,
             "market":              market,
             "one_liner":           desc,
@@ -433,594 +1201,413 @@ def _mock(system: str, user: str) -> str:
 
     # ── Autopsy Agent ─────────────────────────────────────────────────────────
     if "ruthless" in s or "post-mortem analyst" in s:
-        why_text = why or f"{name} struggled to find a repeatable, scalable business model before running out of runway."
-        return json.dumps({
-            "primary_failure_hypothesis": (
-                f"{name} failed to achieve product-market fit within its {active_str} lifespan — "
-                f"spending {funding} without validating a sustainable path to growth, "
-                f"and ultimately shutting down when the gap between capital efficiency and market demand became insurmountable."
-            ),
-            "overall_score": 22,
-            "data_note": (
-                f"Analysis is partially inferred from founder-provided context and publicly available signals. "
-                f"Direct metrics (churn, NPS, revenue) were not publicly disclosed by {name}."
-            ),
-            "timing": {
-                "rating": timing_r,
-                "finding": (
-                    f"{name} operated from {founded} to {shutdown}. "
-                    f"The {category} market during this window was {'still maturing, making customer education expensive and sales cycles long' if timing_r == 'Critical' else 'competitive but addressable with the right positioning'}. "
-                    f"The timing of the shutdown in {shutdown} suggests the team ran out of time before the market came to them."
-                ),
-                "evidence": (
-                    f"Active from {founded}–{shutdown} ({active_str}). "
-                    f"Funding of {funding} was not sufficient to outlast the market timing gap. "
-                    f"{'Founder noted market timing as a factor.' if timing_r == 'Critical' else 'No specific timing crisis was flagged in available signals.'}"
-                )
-            },
-            "market_size_monetization": {
-                "rating": market_r,
-                "finding": (
-                    f"The monetisation model for {name}'s {category} product was never definitively validated at scale. "
-                    f"With {funding} raised, the path to a unit-economics-positive business required either a larger TAM "
-                    f"than the market supported or a pricing model that customers consistently accepted."
-                ),
-                "evidence": (
-                    f"Funding of {funding} is consistent with a seed/Series A stage company that had not yet demonstrated "
-                    f"repeatable revenue. {'Founder cited pricing/monetisation as a challenge.' if market_r == 'Critical' else 'No confirmed ARR or revenue milestones were publicly disclosed.'}"
-                )
-            },
-            "pmf": {
-                "rating": pmf_r,
-                "finding": (
-                    f"{name}'s core product — {desc[:120] if len(desc) > 120 else desc} — "
-                    f"{'showed initial traction but failed to retain customers at the rate needed to justify continued investment' if pmf_r == 'Significant' else 'struggled from the outset to demonstrate consistent, organic customer pull'}. "
-                    f"The gap between early adopter enthusiasm and mainstream adoption was never bridged."
-                ),
-                "evidence": (
-                    f"Shutdown in {shutdown} without a successful exit or acqui-hire strongly implies PMF was not achieved. "
-                    f"{'Growth stalled after initial traction — a classic late-stage PMF failure signal.' if 'growth stalled' in ' '.join(signals).lower() else 'No public retention or engagement metrics confirm sustained PMF.'}"
-                )
-            },
-            "team_execution": {
-                "rating": team_r,
-                "finding": (
-                    f"{'The team fell apart before the company could recover — a critical execution failure that compounded every other problem.' if team_r == 'Critical' else f'{name} faced execution challenges common to startups in the {category} space: hiring the right talent, managing burn, and pivoting quickly enough to stay ahead of market feedback.'}  "
-                    f"The {active_str} window suggests the team had time to attempt corrections but could not find the right formula."
-                ),
-                "evidence": (
-                    f"{'Team fragmentation explicitly cited as a failure factor.' if 'team fell apart' in ' '.join(signals).lower() else f'No public founder conflict data available for {name}. Shutdown timeline implies execution gaps went unresolved for too long.'}"
-                )
-            },
-            "competition_defensibility": {
-                "rating": comp_r,
-                "finding": (
-                    f"{'A larger competitor moved into the space and commoditised the core value proposition before ' + name + ' could build sufficient defensibility.' if comp_r == 'Critical' else f'The {category} space in which {name} competed became increasingly crowded between {founded} and {shutdown}.'}  "
-                    f"Without a clear moat — proprietary data, network effects, or switching costs — "
-                    f"{name} was vulnerable to better-funded competitors replicating its core features."
-                ),
-                "evidence": (
-                    f"{'Competitor copying explicitly cited as a factor.' if comp_r == 'Critical' else f'Standard competitive pressure in the {category} market during {founded}–{shutdown}. No specific copycat event was flagged in available signals.'}"
-                )
-            },
-            "external_factors": {
-                "rating": extern_r,
-                "finding": (
-                    f"{'Regulatory intervention was cited as a direct blocker — an external factor largely outside the team\'s control.' if extern_r == 'Critical' else f'No catastrophic external event appears to have been the primary cause of {name}\'s failure.'}  "
-                    f"However, macro conditions during {founded}–{shutdown} (funding environment, market sentiment in the {category} sector) "
-                    f"may have reduced the window for recovery."
-                ),
-                "evidence": (
-                    f"{'Regulation explicitly cited as a blocking factor.' if extern_r == 'Critical' else 'No confirmed regulatory, pandemic, or macro event was the proximate cause of the shutdown.'}"
-                )
-            }
-        })
+        v = {"name": name, "founded": founded, "shutdown": shutdown, "funding": funding,
+             "category": category, "active_str": active_str}
+        v.update(
+            timing_r=timing_r, market_r=market_r, pmf_r=pmf_r, team_r=team_r, comp_r=comp_r, extern_r=extern_r,
+            desc_120=desc[:120],
+            timing_state=_TIMING_STATE[timing_r],
+            timing_evidence=_TIMING_EVIDENCE[timing_r],
+            market_evidence=_MARKET_EVIDENCE[market_r],
+            pmf_finding=_PMF_FINDING[pmf_r],
+            pmf_evidence=_PMF_EVIDENCE[_sig(signals, "growth stalled")],
+            team_finding=_fill(_TEAM_FINDING[team_r], v),
+            team_evidence=_fill(_TEAM_EVIDENCE[_sig(signals, "team fell apart")], v),
+            comp_finding=_fill(_COMP_FINDING[comp_r], v),
+            comp_evidence=_fill(_COMP_EVIDENCE[comp_r], v),
+            extern_finding=_fill(_EXTERN_FINDING[extern_r], v),
+            extern_evidence=_EXTERN_EVIDENCE[extern_r],
+        )
+        return _dumps(_fill(_AUTOPSY_TPL, v))
 
     # ── Revival Agent ─────────────────────────────────────────────────────────
     # NOTE: must exclude "copywriter" — copywriter system prompt contains "revival_pitch"
     if ("relaunch specialist" in s or "strategist" in s) and "copywriter" not in s:
-        return json.dumps({
-            "core_insight": (
-                f"The problem {name} was trying to solve — {desc[:100] if len(desc) > 100 else desc} — "
-                f"is likely still real and still unsolved. "
-                f"The failure was in execution, timing, and business model, not in the underlying need."
-            ),
-            "revised_name": f"{name} ({CUR_YEAR})",
-            "revised_icp": (
-                f"Early adopters and power users in the {category} space who have already demonstrated "
-                f"willingness to pay for solutions to the problem {name} was solving — "
-                f"specifically in the {market} market, where the timing may now be more favourable."
-            ),
-            "repositioning_statement": (
-                f"The new {name}: same insight, leaner model, built in public with customers from day one."
-            ),
-            "gtm_strategy": {
-                "primary_channel": f"Direct outreach to the top 50 potential customers in the {category} space who experienced the problem firsthand",
-                "why_channel": (
-                    f"The fastest path to PMF validation is talking directly to people who already feel the pain. "
-                    f"In the {category} space, these customers are identifiable and reachable without paid acquisition. "
-                    f"Revenue from 10 paying customers is worth more than 10,000 free signups at this stage."
-                ),
-                "90_day_plan": [
-                    {"week": "1–2", "action": f"Interview 20 potential customers who experienced the exact problem {name} was solving. Record every session. Document the precise language they use — this becomes your copy and positioning."},
-                    {"week": "3–4", "action": f"Build a concierge MVP — solve the problem manually for 3–5 paying customers before writing a line of code. Charge real money from day one. Willingness to pay is the only signal that matters at this stage."},
-                    {"week": "5–6", "action": f"Scope the minimum product required to serve those 3–5 customers better than any existing alternative in the {category} space. Build only that feature set — nothing else."},
-                    {"week": "7–8", "action": f"Expand to 10–15 paying customers in the {market} market. Instrument weekly NPS, churn, and expansion revenue. If NPS < 40, do not expand further — fix the product first."},
-                    {"week": "9–10", "action": f"Study the {category} competitors identified in the research dossier. Map exactly what they do better. Build a clear answer to the question: 'Why would a customer choose us over them today?'"},
-                    {"week": "11–12", "action": f"With 15+ paying customers, positive NPS, and a clear competitive answer, approach 3 angels or pre-seed funds: '{name} failed because of X. We solved X. Here is the proof — 15 paying customers in 90 days.'"}
-                ],
-                "what_not_to_do": [
-                    f"Do NOT raise more than $500K before achieving 10 paying customers — runway should buy validation, not headcount.",
-                    f"Do NOT rebuild the original {name} product feature-for-feature. Start with the core insight only.",
-                    f"Do NOT hire a sales team before you have a repeatable, founder-led sales motion.",
-                    f"Do NOT ignore the reasons {name} failed — run the autopsy findings as a checklist every 30 days.",
-                    f"Do NOT optimise for press coverage before achieving PMF. Stay in stealth until the product speaks for itself."
-                ],
-                "pricing_model": (
-                    f"Value-based pricing anchored to the economic outcome the customer gets — not a cost-plus or competitor-matching model. "
-                    f"Start with a flat monthly fee ({market} benchmark for {category}: $99–$499/month for SMB, $1K–$5K/month for enterprise). "
-                    f"Annual upfront pricing from day one to extend runway and signal commitment from customers."
-                )
-            },
-            "competitive_landscape_today": (
-                f"The {category} market has shifted materially since {name}'s {shutdown} shutdown. "
-                f"Post-2023 AI tooling has reduced the cost of building in this space by 60–80%, meaning the original {name} vision "
-                f"is likely achievable for a fraction of {funding}. Some competitors that existed when {name} shut down may have "
-                f"weakened or pivoted; new players have likely entered. "
-                f"A full competitive audit in {CUR_YEAR} — mapping every current solution against the original problem — is essential before committing to a positioning for the revived product."
-            ),
-            "risk_register": [
-                {
-                    "risk": f"The original failure repeats — spending {funding}-equivalent capital without finding PMF",
-                    "mitigation": f"Hard cap on spending before PMF: no more than $250K before 10 paying customers. If you hit that cap, stop and re-evaluate the thesis — don't raise more."
-                },
-                {
-                    "risk": f"The market has moved on since {shutdown} and the problem is now solved by an incumbent",
-                    "mitigation": f"Before building anything, spend 2 weeks mapping every current solution to the problem. If an incumbent now solves it adequately, the insight is dead — find an adjacent problem."
-                },
-                {
-                    "risk": "Founder credibility gap — the market associates the name with failure",
-                    "mitigation": f"Lead with the lessons, not the brand. A 'Built on the ashes of {name}' narrative is actually a powerful signal of self-awareness if the pitch acknowledges exactly what went wrong and why it's fixed now."
-                }
-            ]
-        })
+        return _dumps(_fill(_REVIVAL_TPL, {
+            "name": name, "shutdown": shutdown, "funding": funding, "category": category,
+            "market": market, "year": CUR_YEAR, "desc_100": desc[:100],
+        }))
 
     # ── Copywriter Agent ──────────────────────────────────────────────────────
     if "elite startup copywriter" in s or "three polished" in s or "copywriter" in s:
-        return json.dumps({
-            "autopsy_summary_card": {
-                "headline": f"How {name} Failed in {active_str}",
-                "primary_hypothesis": (
-                    f"{name} raised {funding} but couldn't find a sustainable business model in the {category} space "
-                    f"before the runway ran out — a failure of validation speed, not vision."
-                ),
-                "top_3_factors": [
-                    f"Failed to achieve product-market fit before capital was exhausted",
-                    f"Operated in a {category} market with strong, often better-funded competitors",
-                    f"Pivoted too late or not enough to find a wedge that customers would pay for"
-                ],
-                "killer_quote": (
-                    f"\"{why[:120] + '…' if why and len(why) > 120 else (why or f'We had the right problem. We had the wrong solution.')}\" — {name} founder perspective"
-                )
-            },
-            "revival_pitch": {
-                "problem": (
-                    f"{desc} — this problem is real and still largely unsolved. "
-                    f"The original {name} approach was expensive, under-validated, and vulnerable to better-funded competitors. "
-                    f"Customers in the {category} space are still searching for a purpose-built solution that the market hasn't delivered."
-                ),
-                "solution": (
-                    f"{name} ({CUR_YEAR}): same core insight, completely rebuilt execution. "
-                    f"We start with 10 paying customers and a concierge MVP before writing a line of scalable code. "
-                    f"Post-2023 AI infrastructure cuts build cost by 60–80%, meaning we can validate in 90 days what the original took {active_str} to attempt."
-                ),
-                "market": (
-                    f"The {category} market in {market} has grown and matured since {shutdown}. "
-                    f"Buyer education costs are lower, infrastructure is commoditised, and the timing window that worked against {name} "
-                    f"may now be firmly in our favour. The {CUR_YEAR} market is fundamentally different from the one that rejected the original."
-                ),
-                "why_now": (
-                    f"Three forces converge in {CUR_YEAR}: (1) AI tooling cuts the cost of building in {category} by 60–80%; "
-                    f"(2) the {category} market has matured — customers are more educated and infrastructure is cheaper; "
-                    f"(3) the lessons from {name}'s failure are now a blueprint, not a scar. "
-                    f"What required {funding} and {active_str} to attempt can now be validated for under $500K in 90 days."
-                ),
-                "ask": (
-                    f"Raising $1.5M pre-seed to reach 25 paying customers and $500K ARR within 12 months. "
-                    f"{name} spent {funding} proving the problem is real. "
-                    f"We're spending $1.5M proving we can own the solution — with a 90-day concierge validation before a single line of scalable code is written."
-                )
-            },
-            "elevator_pitch": (
-                f"{name} ({CUR_YEAR}) is a lean revival of the original {name} — {desc[:90]}{'…' if len(desc) > 90 else ''} — "
-                f"rebuilt with every lesson from the original failure baked into the founding thesis. "
-                f"The original spent {funding} on the wrong execution; we're spending $1.5M on the right one, starting with 10 paying customers before we write a line of scalable code."
-            )
-        })
+        quote = (why[:120] + "…" if len(why) > 120 else why) or "We had the right problem. We had the wrong solution."
+        return _dumps(_fill(_COPY_TPL, {
+            "name": name, "shutdown": shutdown, "funding": funding, "category": category,
+            "market": market, "desc": desc, "active_str": active_str, "year": CUR_YEAR,
+            "quote": quote, "desc_90": desc[:90] + "…" if len(desc) > 90 else desc,
+        }))
 
     return f"Analysis complete for {name}."
 
 
 # ── LangGraph State ───────────────────────────────────────────────────────────
-class AutopsyState(TypedDict):
+@dataclass(slots=True)
+class AutopsyState:
     # Stage 1 — Basic Identity
     startup_name:        str
-    industry:            str
-    country:             str
-    year_founded:        str
-    year_shutdown:       str
-    funding_range:       str
-    product_description: str
+    industry:            str       = ""
+    country:             str       = ""
+    year_founded:        str       = ""
+    year_shutdown:       str       = ""
+    funding_range:       str       = ""
+    product_description: str       = ""
 
     # Stage 2 — Founder's Perspective (optional)
-    startup_overview:    str
-    why_failed_shutdown: str
-    founder_why_failed:  str
-    customer_feedback:   str
-    pivots_tried:        str
-    what_different:      str
+    startup_overview:    str       = ""
+    why_failed_shutdown: str       = ""
+    founder_why_failed:  str       = ""
+    customer_feedback:   str       = ""
+    pivots_tried:        str       = ""
+    what_different:      str       = ""
 
     # Stage 3 — Context Signals (checkboxes)
-    context_signals:     list[str]
+    context_signals:     list[str] = dataclasses.field(default_factory=list)
+
+    # Founder inputs rendered once by context_node for every agent prompt;
+    # over-long free-text fields are condensed into summaries first
+    summaries:           dict[str, str] = dataclasses.field(default_factory=dict)
+    context:             str       = ""
 
     # Agent Outputs
-    research:            dict
-    autopsy:             dict
-    revival:             dict
-    copywriter_outputs:  dict
-    marketing_html:      str
+    research:            dict      = dataclasses.field(default_factory=dict)
+    research_json:       str       = ""  # dossier serialised once, shared by downstream prompts
+    autopsy:             dict      = dataclasses.field(default_factory=dict)
+    revival:             dict      = dataclasses.field(default_factory=dict)
+    copywriter_outputs:  dict      = dataclasses.field(default_factory=dict)
+    marketing_html:      str       = ""
 
     # Meta
-    progress:            list[str]
-    data_confidence:     str
-    error:               Optional[str]
+    progress:            list[str] = dataclasses.field(default_factory=list)
+    data_confidence:     str       = "medium"
+    error:               Optional[str] = None
 
 
 # ── Helper ────────────────────────────────────────────────────────────────────
 def _extract_json(text: str) -> str:
-    match = re.search(r'\{[\s\S]*\}', text)
-    return match.group(0) if match else text
+    """
+    Return the first balanced {...} object in an LLM reply, skipping braces
+    inside string literals. Falls back to first-{ … last-} when the object
+    never closes (truncated reply), and to the whole text when there is none.
+    """
+    start = text.find("{")
+    if start < 0:
+        return text
+    depth, in_str, esc = 0, False, False
+    for j in range(start, len(text)):
+        c = text[j]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == "\\":
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if not depth:
+                return text[start:j + 1]
+    end = text.rfind("}")
+    return text[start:end + 1] if end > start else text
+
+
+# Optional founder inputs, in prompt order: (state key, line template)
+_CTX_FIELDS = (
+    ("startup_overview",    "Founder's description of the startup: {}"),
+    ("why_failed_shutdown", "Why it failed and shut down (founder's account): {}"),
+    ("founder_why_failed",  "Founder's view on failure: {}"),
+    ("customer_feedback",   "Customer feedback: {}"),
+    ("pivots_tried",        "Pivots attempted: {}"),
+    ("what_different",      "What they'd do differently: {}"),
+)
 
 
 def _build_context(state: AutopsyState) -> str:
     """Build a rich context string from all user inputs for agent consumption."""
     parts = [
-        f"Startup: {state['startup_name']}",
-        f"Industry: {state.get('industry', 'Unknown')}",
-        f"Market: {state.get('country', 'Unknown')}",
-        f"Active: {state.get('year_founded', '?')} → {state.get('year_shutdown', '?')}",
-        f"Funding: {state.get('funding_range', 'Unknown')}",
-        f"What it did: {state.get('product_description', '')}",
+        f"Startup: {state.startup_name}",
+        f"Industry: {state.industry}",
+        f"Market: {state.country}",
+        f"Active: {state.year_founded} → {state.year_shutdown}",
+        f"Funding: {state.funding_range}",
+        f"What it did: {state.product_description}",
     ]
-    if state.get('startup_overview'):
-        parts.append(f"Founder's description of the startup: {state['startup_overview']}")
-    if state.get('why_failed_shutdown'):
-        parts.append(f"Why it failed and shut down (founder's account): {state['why_failed_shutdown']}")
-    if state.get('founder_why_failed'):
-        parts.append(f"Founder's view on failure: {state['founder_why_failed']}")
-    if state.get('customer_feedback'):
-        parts.append(f"Customer feedback: {state['customer_feedback']}")
-    if state.get('pivots_tried'):
-        parts.append(f"Pivots attempted: {state['pivots_tried']}")
-    if state.get('what_different'):
-        parts.append(f"What they'd do differently: {state['what_different']}")
-    if state.get('context_signals'):
-        parts.append(f"Known failure signals: {', '.join(state['context_signals'])}")
+    summaries = state.summaries or {}
+    parts += [fmt.format(summaries.get(key, v)) for key, fmt in _CTX_FIELDS if (v := getattr(state, key))]
+    if signals := state.context_signals:
+        parts.append(f"Known failure signals: {', '.join(signals)}")
     return "\n".join(parts)
 
 
+# ── Context ───────────────────────────────────────────────────────────────────
+SUMMARY_THRESHOLD = 1500  # chars; longer founder notes are condensed once up front
+
+_SUMMARY_SYSTEM = (
+    "Condense the founder's note below to at most 300 tokens. Keep every factual claim, number and "
+    "date, and keep the founder's own wording where you can. Return plain text only."
+)
+
+
+async def context_node(state: AutopsyState) -> dict:
+    """
+    Render the founder inputs once; the inputs don't change during a run.
+    Free-text fields over SUMMARY_THRESHOLD are summarised by the cheaper
+    SUMMARY_MODEL first, so every agent prompt carries the short version.
+    """
+    long_keys = [k for k, _ in _CTX_FIELDS if len(getattr(state, k)) > SUMMARY_THRESHOLD]
+    summaries = dict(zip(long_keys, await asyncio.gather(
+        *(allm(_SUMMARY_SYSTEM, getattr(state, k), model=SUMMARY_MODEL) for k in long_keys))))
+    return {"summaries": summaries,
+            "context": _build_context(dataclasses.replace(state, summaries=summaries))}
+
+
+# Shared lead-in for every agent's system prompt, so all four calls open with
+# the same bytes; each agent adds only its role and output keys
+_PREAMBLE = (
+    "You are one stage of relaunch.ai, which dissects failed startups and plans their relaunch. "
+    "Be specific and evidence-backed, never generic. Return ONLY valid JSON with the keys listed.\n"
+)
+
+
 # ── Agent 1: Research ─────────────────────────────────────────────────────────
-def research_agent(state: AutopsyState) -> AutopsyState:
-    logger.info(json.dumps({"agent": "research", "startup": state["startup_name"]}))
-
-    user_ctx = _build_context(state)
-    raw = llm(
-        "You are a startup research analyst with encyclopaedic knowledge of tech, venture capital, and business history. "
-        "Your job is to produce a structured research dossier on a failed startup. "
-        "Gather everything publicly known: funding rounds, investors, team, press coverage, founder interviews, "
-        "community signals (Reddit, HN, Product Hunt), pivots, competitor landscape, and market conditions. "
-        "If little public data is available, set data_confidence to 'low' and note what is missing. "
-        "Return ONLY valid JSON with keys: name, founded, shutdown, funding, investors, category, market, "
-        "one_liner, what_they_built, press_coverage, founder_interviews, community_signals, pivots, "
-        "competitor_landscape, market_conditions, data_confidence (high/medium/low), public_data_available (bool).",
-        user_ctx
-    )
+_RESEARCH_SYSTEM = _PREAMBLE + (
+    "Role: startup research analyst with encyclopaedic knowledge of tech, VC and business history. "
+    "Build a research dossier on the failed startup from everything publicly known: funding, investors, team, "
+    "press, founder interviews, community signals (Reddit, HN, Product Hunt), pivots, competitors, market conditions. "
+    "If public data is thin, set data_confidence to 'low' and say what is missing.\n"
+    "Keys: name, founded, shutdown, funding, investors, category, market, one_liner, what_they_built, "
+    "press_coverage, founder_interviews, community_signals, pivots, competitor_landscape, market_conditions, "
+    "data_confidence (high/medium/low), public_data_available (bool)."
+)
+
+
+async def research_agent(state: AutopsyState) -> dict:
+    _log_agent("research", state)
+
+    user_ctx = state.context or _build_context(state)
+    raw = await allm(_RESEARCH_SYSTEM, user_ctx)
     try:
-        data = json.loads(_extract_json(raw))
+        data = _loads(_extract_json(raw))
     except Exception:
-        data = {"name": state["startup_name"], "one_liner": raw[:200],
+        data = {"name": state.startup_name, "one_liner": raw[:200],
                 "data_confidence": "low", "public_data_available": False}
 
     confidence = data.get("data_confidence", "medium")
-    progress = state.get("progress", []) + [f"✅ Research dossier built — confidence: {confidence.upper()}"]
-    return {**state, "research": data, "data_confidence": confidence, "progress": progress}
+    progress = state.progress + [f"✅ Research dossier built — confidence: {confidence.upper()}"]
+    return {"research": data, "research_json": _dumps(data, indent=True),
+            "data_confidence": confidence, "progress": progress}
 
 
-# ── Agent 2: Autopsy ──────────────────────────────────────────────────────────
-def autopsy_agent(state: AutopsyState) -> AutopsyState:
-    logger.info(json.dumps({"agent": "autopsy", "startup": state["startup_name"]}))
-
-    research_ctx = json.dumps(state.get("research", {}), indent=2)
-    user_ctx     = _build_context(state)
-    low_data_note = (
-        "\nNOTE: Limited public data is available for this startup. "
-        "Be explicit about what you are inferring vs. what you found directly. "
-        "Lean heavily on the founder's own inputs where public data is sparse."
-        if state.get("data_confidence") == "low" else ""
-    )
+def _dossier(state: AutopsyState) -> str:
+    # Leads every downstream user prompt, byte-identical from call to call
+    return f"Research dossier:\n{state.research_json or _dumps(state.research, indent=True)}\n\n"
+
 
-    raw = llm(
-        "You are the world's most ruthless startup post-mortem analyst. "
-        "Analyse this startup's failure across exactly six dimensions with specific, evidence-backed reasoning. "
-        "Be harsh, honest, and specific — not generic. This is the honest advisor the founder never had. "
-        "Return ONLY valid JSON with keys: "
-        "primary_failure_hypothesis (one clear sentence — the single most important reason), "
-        "overall_score (0–100 survival score, most failures score under 30), "
-        "data_note (string, empty if data was sufficient), "
-        "timing {rating, finding, evidence}, "
-        "market_size_monetization {rating, finding, evidence}, "
-        "pmf {rating, finding, evidence}, "
-        "team_execution {rating, finding, evidence}, "
-        "competition_defensibility {rating, finding, evidence}, "
-        "external_factors {rating, finding, evidence}. "
-        "Ratings: Critical / Significant / Minor / Not a factor." + low_data_note,
-        f"startup_name: \"{state['startup_name']}\"\n\nResearch dossier:\n{research_ctx}\n\nFounder inputs:\n{user_ctx}"
+# ── Agent 2: Autopsy ──────────────────────────────────────────────────────────
+_AUTOPSY_SYSTEM = _PREAMBLE + (
+    "Role: ruthless startup post-mortem analyst — the honest advisor the founder never had. "
+    "Analyse the failure across six lenses, each {rating, finding, evidence}, "
+    "rating one of Critical / Significant / Minor / Not a factor.\n"
+    "Keys: primary_failure_hypothesis (one sentence, the single most important reason), "
+    "overall_score (0–100 survival score, most failures under 30), data_note (empty if data was sufficient), "
+    "timing, market_size_monetization, pmf, team_execution, competition_defensibility, external_factors."
+)
+_LOW_DATA_NOTE = (
+    "\n\nNOTE: Limited public data is available for this startup. "
+    "Be explicit about what you are inferring vs. what you found directly. "
+    "Lean heavily on the founder's own inputs where public data is sparse."
+)
+
+
+async def autopsy_agent(state: AutopsyState) -> dict:
+    _log_agent("autopsy", state)
+
+    user_ctx     = state.context or _build_context(state)
+    low_data_note = _LOW_DATA_NOTE if state.data_confidence == "low" else ""
+
+    raw = await allm(
+        _AUTOPSY_SYSTEM,
+        f"{_dossier(state)}startup_name: \"{state.startup_name}\"\n\nFounder inputs:\n{user_ctx}{low_data_note}"
     )
     try:
-        data = json.loads(_extract_json(raw))
+        data = _loads(_extract_json(raw))
     except Exception:
         data = {"primary_failure_hypothesis": raw[:300], "overall_score": 15}
 
-    progress = state.get("progress", []) + ["✅ Autopsy complete — 6-lens failure analysis done"]
-    return {**state, "autopsy": data, "progress": progress}
+    progress = state.progress + ["✅ Autopsy complete — 6-lens failure analysis done"]
+    return {"autopsy": data, "progress": progress}
 
 
 # ── Agent 3: Revival Strategist ───────────────────────────────────────────────
-def revival_agent(state: AutopsyState) -> AutopsyState:
-    logger.info(json.dumps({"agent": "revival", "startup": state["startup_name"]}))
+_REVIVAL_SYSTEM = _PREAMBLE + (
+    f"Role: startup strategist and relaunch specialist. Design the startup relaunched in {CUR_YEAR} "
+    f"with every autopsy lesson baked in; be opinionated and actionable.\n"
+    "Keys: core_insight (the good idea buried in the failure), revised_name, revised_icp, "
+    "repositioning_statement (corrects the original positioning), gtm_strategy {primary_channel, why_channel, "
+    "90_day_plan [{week, action}], what_not_to_do [string], pricing_model}, "
+    "competitive_landscape_today (how the space changed since), risk_register [{risk, mitigation}] (top 3)."
+)
+
+
+async def revival_agent(state: AutopsyState) -> dict:
+    _log_agent("revival", state)
+
+    summaries = state.summaries or {}
 
-    context = json.dumps({
-        "research": state.get("research", {}),
-        "autopsy":  state.get("autopsy",  {}),
+    context = _dumps({
+        "autopsy":  state.autopsy,
         "founder_inputs": {
-            "why_failed":         state.get("founder_why_failed", ""),
-            "customer_feedback":  state.get("customer_feedback", ""),
-            "pivots_tried":       state.get("pivots_tried", ""),
-            "what_different":     state.get("what_different", ""),
-            "context_signals":    state.get("context_signals", [])
+            "why_failed":         summaries.get("founder_why_failed") or state.founder_why_failed,
+            "customer_feedback":  summaries.get("customer_feedback") or state.customer_feedback,
+            "pivots_tried":       summaries.get("pivots_tried") or state.pivots_tried,
+            "what_different":     summaries.get("what_different") or state.what_different,
+            "context_signals":    state.context_signals
         }
-    }, indent=2)
-
-    raw = llm(
-        f"You are a world-class startup strategist and relaunch specialist. "
-        f"Given this failed startup's full autopsy, design what it would look like relaunched in {CUR_YEAR} "
-        f"with every lesson baked in. Be specific, opinionated, and actionable — not generic. "
-        "Return ONLY valid JSON with keys: "
-        "core_insight (the genuine good idea buried in the failure), "
-        "revised_name, revised_icp, repositioning_statement (corrects original positioning mistakes), "
-        "gtm_strategy { primary_channel, why_channel, 90_day_plan (array of {week, action}), "
-        "what_not_to_do (array of strings), pricing_model }, "
-        "competitive_landscape_today (has the space changed since failure?), "
-        "risk_register (array of {risk, mitigation} — top 3 only).",
-        f"startup_name: \"{state['startup_name']}\"\n\nFull context:\n{context}\n\nBuild the definitive 2025 revival strategy."
+    }, indent=True)
+
+    raw = await allm(
+        _REVIVAL_SYSTEM,
+        f"{_dossier(state)}startup_name: \"{state.startup_name}\"\n\nFull context:\n{context}\n\nBuild the definitive 2025 revival strategy."
     )
     try:
-        data = json.loads(_extract_json(raw))
+        data = _loads(_extract_json(raw))
     except Exception:
         data = {"core_insight": raw[:300]}
 
-    progress = state.get("progress", []) + ["✅ Revival strategy built — GTM, ICP, risk register ready"]
-    return {**state, "revival": data, "progress": progress}
+    progress = state.progress + ["✅ Revival strategy built — GTM, ICP, risk register ready"]
+    return {"revival": data, "progress": progress}
 
 
 # ── Agent 4: Copywriter ───────────────────────────────────────────────────────
-def copywriter_agent(state: AutopsyState) -> AutopsyState:
-    logger.info(json.dumps({"agent": "copywriter", "startup": state["startup_name"]}))
-
-    context = json.dumps({
-        "research":  state.get("research", {}),
-        "autopsy":   state.get("autopsy",  {}),
-        "revival":   state.get("revival",  {}),
-    }, indent=2)
-    founder_provided = bool(state.get("founder_why_failed") or state.get("what_different"))
-
-    raw = llm(
-        "You are an elite startup copywriter — YC Demo Day meets Stripe's homepage. "
-        "Produce exactly three polished outputs for the revived startup. "
-        "Write in the voice of a confident founder, not an AI. Be punchy and specific. "
-        "Return ONLY valid JSON with keys: "
-        "autopsy_summary_card { headline, primary_hypothesis, top_3_factors (array), killer_quote }, "
-        "revival_pitch { problem, solution, market, why_now, ask }, "
-        "elevator_pitch (string — exactly 3 sentences: what it does, who it's for, why it wins this time)."
-        + ("\nNote: No founder perspective was provided — keep the revival pitch founder-agnostic." if not founder_provided else ""),
-        f"startup_name: \"{state['startup_name']}\"\n\nFull context:\n{context}"
+_COPYWRITER_SYSTEM = _PREAMBLE + (
+    "Role: elite startup copywriter — YC Demo Day meets Stripe's homepage. "
+    "Write three polished outputs for the revived startup in a confident founder's voice, punchy, not like an AI.\n"
+    "Keys: autopsy_summary_card {headline, primary_hypothesis, top_3_factors [string], killer_quote}, "
+    "revival_pitch {problem, solution, market, why_now, ask}, "
+    "elevator_pitch (exactly 3 sentences: what it does, who it's for, why it wins this time)."
+)
+_NO_FOUNDER_NOTE = "\n\nNote: No founder perspective was provided — keep the revival pitch founder-agnostic."
+
+
+async def copywriter_agent(state: AutopsyState) -> dict:
+    _log_agent("copywriter", state)
+
+    context = _dumps({
+        "autopsy":   state.autopsy,
+        "revival":   state.revival,
+    }, indent=True)
+    founder_provided = bool(state.founder_why_failed or state.what_different)
+
+    raw = await allm(
+        _COPYWRITER_SYSTEM,
+        f"{_dossier(state)}startup_name: \"{state.startup_name}\"\n\nFull context:\n{context}"
+        + ("" if founder_provided else _NO_FOUNDER_NOTE)
     )
     try:
-        data = json.loads(_extract_json(raw))
+        data = _loads(_extract_json(raw))
     except Exception:
         data = {"elevator_pitch": raw[:300]}
 
-    progress = state.get("progress", []) + ["✅ Copy written — summary card, pitch & elevator ready"]
-    return {**state, "copywriter_outputs": data, "progress": progress}
+    progress = state.progress + ["✅ Copy written — summary card, pitch & elevator ready"]
+    return {"copywriter_outputs": data, "progress": progress}
 
 
 # ── Agent 5: Marketing Page ───────────────────────────────────────────────────
-def marketing_agent(state: AutopsyState) -> AutopsyState:
-    logger.info(json.dumps({"agent": "marketing", "startup": state["startup_name"]}))
-
-    research   = state.get("research", {})
-    autopsy    = state.get("autopsy",  {})
-    revival    = state.get("revival",  {})
-    copy_out   = state.get("copywriter_outputs", {})
-    pitch      = copy_out.get("revival_pitch", {})
-    card       = copy_out.get("autopsy_summary_card", {})
-
-    orig_name    = research.get("name",    state["startup_name"])
-    revised_name = revival.get("revised_name", orig_name + " (Relaunch)")
-    orig_funding = research.get("funding", "")
-    score        = autopsy.get("overall_score", autopsy.get("score", 20))
-    hypothesis   = autopsy.get("primary_failure_hypothesis", "")
-    insight      = revival.get("core_insight", "")
-    icp          = revival.get("revised_icp", "")
-    reposition   = revival.get("repositioning_statement", "")
-    channels_txt = revival.get("gtm_strategy", {}).get("primary_channel", "")
-    pricing      = revival.get("gtm_strategy", {}).get("pricing_model", "")
-    what_not     = revival.get("gtm_strategy", {}).get("what_not_to_do", [])
-    plan         = revival.get("gtm_strategy", {}).get("90_day_plan", [])
-    risks        = revival.get("risk_register", [])
-    comp_today   = revival.get("competitive_landscape_today", "")
-    elevator     = copy_out.get("elevator_pitch", "")
-    top3         = card.get("top_3_factors", [])
-    killer_quote = card.get("killer_quote", "")
-
-    lens_labels = {
-        "timing": "⏱ Timing",
-        "market_size_monetization": "💰 Market & Monetization",
-        "pmf": "🎯 Product-Market Fit",
-        "team_execution": "👥 Team & Execution",
-        "competition_defensibility": "⚔️ Competition",
-        "external_factors": "🌍 External Factors"
-    }
-    rating_colors = {"Critical":"#ff4444","Significant":"#ff8c00","Minor":"#f0b429","Not a factor":"#34d399"}
-
-    lens_cards = ""
-    for key, label in lens_labels.items():
-        d = autopsy.get(key, {})
-        if not d: continue
-        color = rating_colors.get(d.get("rating",""), "#888")
-        lens_cards += f"""
-        <div class="lc">
-          <div class="lc-top"><span class="lc-name">{label}</span>
-            <span class="lc-badge" style="background:{color}">{d.get('rating','—')}</span></div>
-          <p class="lc-find">{d.get('finding','')}</p>
-          <p class="lc-ev">📍 {d.get('evidence','')}</p>
-        </div>"""
-
-    plan_rows = "".join(f"""
-      <div class="pr"><div class="pw">Week {p.get('week','')}</div>
-      <div class="pa">{p.get('action','')}</div></div>""" for p in plan)
-
-    dont_rows = "".join(f"<li>{d}</li>" for d in what_not)
-    risk_rows = "".join(f"""
-      <div class="risk-row"><div class="risk-label">⚠ {r.get('risk','')}</div>
-      <div class="risk-mit">→ {r.get('mitigation','')}</div></div>""" for r in risks)
-    top3_rows = "".join(f'<li>{f}</li>' for f in top3)
-
-    html = f"""<!DOCTYPE html><html lang="en">
+# Autopsy lenses in page order: (autopsy key, card label)
+_LENS_LABELS: tuple[tuple[str, str], ...] = (
+    ("timing",                    "⏱ Timing"),
+    ("market_size_monetization",  "💰 Market & Monetization"),
+    ("pmf",                       "🎯 Product-Market Fit"),
+    ("team_execution",            "👥 Team & Execution"),
+    ("competition_defensibility", "⚔️ Competition"),
+    ("external_factors",          "🌍 External Factors"),
+)
+
+# Investor-pitch rows in page order: (row label, revival_pitch key)
+_PITCH_FIELDS: tuple[tuple[str, str], ...] = (
+    ("Problem", "problem"), ("Solution", "solution"), ("Market", "market"),
+    ("Why Now", "why_now"), ("Ask", "ask"),
+)
+
+# Lens badge colours, indexed by rating; anything unrecognised gets the last (grey)
+_RATING_IDX    = {"Critical": 0, "Significant": 1, "Minor": 2, "Not a factor": 3}
+_RATING_COLORS = ("#ff4444", "#ff8c00", "#f0b429", "#34d399", "#888")
+
+# Landing-page shell for marketing_agent, rendered by a compiled Jinja2
+# template. Autoescaped, so agent text can't inject markup into the page.
+# Styles live in static/relaunch.css so browsers cache them across pages.
+_MARKETING_TPL = """<!DOCTYPE html><html lang="en">
 <head><meta charset="UTF-8"/><meta name="viewport" content="width=device-width,initial-scale=1"/>
-<title>{revised_name} — relaunch.ai</title>
-<style>
-:root{{--a:#6c63ff;--a2:#a78bfa;--dk:#0d0d14;--s:#13131d;--c:#1a1a27;--c2:#1e1e2e;--t:#e2e8f0;--m:#94a3b8;--r:12px}}
-*{{box-sizing:border-box;margin:0;padding:0}}body{{font-family:'Segoe UI',system-ui,sans-serif;background:var(--dk);color:var(--t);line-height:1.6}}
-.container{{max-width:860px;margin:0 auto;padding:0 24px}}
-nav{{background:rgba(13,13,20,.95);backdrop-filter:blur(12px);padding:14px 24px;display:flex;align-items:center;justify-content:space-between;border-bottom:1px solid #ffffff0d;position:sticky;top:0;z-index:99}}
-.nlogo{{font-size:1rem;font-weight:800;background:linear-gradient(135deg,var(--a),var(--a2));-webkit-background-clip:text;-webkit-text-fill-color:transparent}}
-.nbadge{{background:#6c63ff22;border:1px solid #6c63ff44;color:var(--a2);font-size:.7rem;padding:4px 12px;border-radius:20px;font-weight:600}}
-.hero{{padding:80px 0 60px;text-align:center;background:radial-gradient(ellipse 80% 50% at 50% 0%,#6c63ff18,transparent 70%)}}
-.orig-tag{{display:inline-block;background:#ff444418;color:#ff8888;border:1px solid #ff444433;border-radius:20px;padding:4px 14px;font-size:.78rem;margin-bottom:20px}}
-.hero h1{{font-size:clamp(2.2rem,6vw,3.8rem);font-weight:900;line-height:1.1;margin-bottom:16px;letter-spacing:-.03em}}
-.grad{{background:linear-gradient(135deg,var(--a),var(--a2));-webkit-background-clip:text;-webkit-text-fill-color:transparent}}
-.hero-sub{{color:var(--m);font-size:1.05rem;max-width:560px;margin:0 auto 32px;line-height:1.65}}
-.elevator{{background:var(--c);border:1px solid #6c63ff33;border-radius:var(--r);padding:20px 28px;max-width:660px;margin:0 auto;font-style:italic;color:var(--t);font-size:.95rem;line-height:1.65}}
-section{{padding:56px 0}}
-.sec-label{{color:var(--a);font-size:.72rem;font-weight:700;text-transform:uppercase;letter-spacing:.12em;margin-bottom:8px}}
-h2{{font-size:1.65rem;font-weight:800;margin-bottom:6px}}
-.sec-sub{{color:var(--m);margin-bottom:28px;font-size:.92rem}}
-.hypo-box{{background:linear-gradient(135deg,var(--c2),var(--c));border:1px solid #ff444433;border-radius:var(--r);padding:24px 28px;position:relative;overflow:hidden;margin-bottom:24px}}
-.hypo-box::after{{content:'☠';position:absolute;right:20px;top:8px;font-size:4rem;opacity:.08}}
-.hypo-label{{color:#ff8888;font-size:.7rem;font-weight:700;text-transform:uppercase;letter-spacing:.1em;margin-bottom:10px}}
-.hypo-text{{color:#fff;font-size:1rem;line-height:1.6}}
-.score-row{{display:flex;align-items:center;gap:12px;margin-top:16px}}
-.score-bar-wrap{{flex:1;height:5px;background:#ffffff10;border-radius:3px;overflow:hidden}}
-.score-bar{{height:100%;background:linear-gradient(90deg,#ff4444,#ff7700);border-radius:3px}}
-.score-num{{color:#ff8888;font-weight:800;font-size:.95rem;white-space:nowrap}}
-.lg{{display:grid;grid-template-columns:1fr 1fr;gap:14px}}@media(max-width:600px){{.lg{{grid-template-columns:1fr}}}}
-.lc{{background:var(--c);border:1px solid #ffffff08;border-radius:var(--r);padding:18px}}
-.lc-top{{display:flex;justify-content:space-between;align-items:center;margin-bottom:10px}}
-.lc-name{{font-weight:700;font-size:.88rem}}
-.lc-badge{{font-size:.66rem;font-weight:700;padding:3px 9px;border-radius:20px;color:#000}}
-.lc-find{{color:var(--t);font-size:.85rem;line-height:1.5;margin-bottom:6px}}
-.lc-ev{{color:var(--m);font-size:.78rem;font-style:italic}}
-.insight{{background:#6c63ff12;border-left:4px solid var(--a);border-radius:0 10px 10px 0;padding:16px 20px;margin:20px 0;font-style:italic;font-size:.95rem}}
-.rg{{display:grid;grid-template-columns:1fr 1fr;gap:14px;margin-top:20px}}@media(max-width:600px){{.rg{{grid-template-columns:1fr}}}}
-.rc{{background:var(--c);border:1px solid #6c63ff22;border-radius:var(--r);padding:18px}}
-.rc .rl{{color:var(--a);font-size:.68rem;font-weight:700;text-transform:uppercase;letter-spacing:.1em;margin-bottom:7px}}
-.rc .rv{{color:var(--t);font-size:.88rem;line-height:1.5}}
-.dont-list,.risk-rows{{margin-top:14px}}
-.dont-list li{{padding:8px 0 8px 18px;border-bottom:1px solid #ffffff07;color:#ff8888;font-size:.86rem;position:relative}}
-.dont-list li::before{{content:'✗';position:absolute;left:0;color:#ff4444;font-weight:700}}
-.pr{{display:flex;gap:14px;padding:12px 0;border-bottom:1px solid #ffffff07;align-items:flex-start}}
-.pw{{min-width:76px;background:var(--a);color:#fff;border-radius:6px;padding:3px 8px;font-size:.72rem;font-weight:700;text-align:center;flex-shrink:0;margin-top:3px}}
-.pa{{color:var(--t);font-size:.87rem;line-height:1.5}}
-.risk-row{{background:var(--c);border-radius:8px;padding:14px 16px;margin-bottom:10px;border-left:3px solid #ff8c00}}
-.risk-label{{color:#ffaa44;font-size:.87rem;font-weight:600;margin-bottom:4px}}
-.risk-mit{{color:var(--m);font-size:.83rem}}
-.pitch-card{{background:linear-gradient(135deg,var(--c2),var(--c));border:1px solid #6c63ff33;border-radius:var(--r);padding:28px}}
-.pitch-section{{margin-top:16px}}
-.pitch-section .pl{{color:var(--a);font-size:.68rem;font-weight:700;text-transform:uppercase;letter-spacing:.1em;margin-bottom:5px}}
-.pitch-section .pv{{color:var(--t);font-size:.9rem;line-height:1.55}}
-.top3-list li{{padding:7px 0 7px 18px;border-bottom:1px solid #ffffff07;font-size:.87rem;position:relative}}
-.top3-list li::before{{content:'•';position:absolute;left:0;color:var(--a);font-weight:700}}
-blockquote{{background:var(--c2);border-left:3px solid var(--a2);border-radius:0 8px 8px 0;padding:14px 18px;font-style:italic;color:var(--t);font-size:.9rem;margin-top:16px}}
-footer{{border-top:1px solid #ffffff0d;padding:28px 0;text-align:center;color:var(--m);font-size:.82rem}}
-footer strong{{color:var(--a)}}
-::-webkit-scrollbar{{width:5px}}::-webkit-scrollbar-thumb{{background:#333;border-radius:3px}}
-</style></head><body>
+<title>{{ revised_name }} — relaunch.ai</title>
+<link rel="stylesheet" href="/static/relaunch.css"/></head><body>
 <nav><div class="nlogo">🔬 relaunch.ai</div><span class="nbadge">AI-Generated Relaunch Plan</span></nav>
 
 <section class="hero"><div class="container">
-  <div class="orig-tag">☠ Originally failed as: {orig_name}{f" ({orig_funding} raised)" if orig_funding else ""}</div>
-  <h1>Introducing<br/><span class="grad">{revised_name}</span></h1>
-  <p class="hero-sub">{reposition or icp}</p>
-  <div class="elevator">"{elevator}"</div>
+  <div class="orig-tag">☠ Originally failed as: {{ orig_name }}{% if orig_funding %} ({{ orig_funding }} raised){% endif %}</div>
+  <h1>Introducing<br/><span class="grad">{{ revised_name }}</span></h1>
+  <p class="hero-sub">{{ reposition or icp }}</p>
+  <div class="elevator">"{{ elevator }}"</div>
 </div></section>
 
 <section style="background:var(--s)"><div class="container">
-  <div class="sec-label">Post-Mortem</div><h2>Why {orig_name} Really Failed</h2>
+  <div class="sec-label">Post-Mortem</div><h2>Why {{ orig_name }} Really Failed</h2>
   <p class="sec-sub">Six-lens forensic analysis. No excuses.</p>
   <div class="hypo-box">
     <div class="hypo-label">Primary Failure Hypothesis</div>
-    <div class="hypo-text">"{hypothesis}"</div>
+    <div class="hypo-text">"{{ hypothesis }}"</div>
     <div class="score-row">
-      <span class="score-num">Survival Score: {score}/100</span>
-      <div class="score-bar-wrap"><div class="score-bar" style="width:{score}%"></div></div>
+      <span class="score-num">Survival Score: {{ score }}/100</span>
+      <div class="score-bar-wrap"><div class="score-bar" style="width:{{ score }}%"></div></div>
     </div>
   </div>
-  {"<div class='lg'>" + lens_cards + "</div>" if lens_cards else ""}
-  {"<blockquote>" + killer_quote + "</blockquote>" if killer_quote else ""}
+  {% if lenses %}<div class='lg'>{% for label, d, color in lenses %}
+        <div class="lc">
+          <div class="lc-top"><span class="lc-name">{{ label }}</span>
+            <span class="lc-badge" style="background:{{ color }}">{{ d.get('rating','—') }}</span></div>
+          <p class="lc-find">{{ d.get('finding','') }}</p>
+          <p class="lc-ev">📍 {{ d.get('evidence','') }}</p>
+        </div>{% endfor %}</div>{% endif %}
+  {% if killer_quote %}<blockquote>{{ killer_quote }}</blockquote>{% endif %}
 </div></section>
 
 <section><div class="container">
-  <div class="sec-label">The Revival</div><h2>What {revised_name} Looks Like in 2025</h2>
+  <div class="sec-label">The Revival</div><h2>What {{ revised_name }} Looks Like in 2025</h2>
   <p class="sec-sub">Same core insight. Completely different execution.</p>
-  <div class="insight">💡 {insight}</div>
+  <div class="insight">💡 {{ insight }}</div>
   <div class="rg">
-    <div class="rc"><div class="rl">Revised ICP</div><div class="rv">{icp}</div></div>
-    <div class="rc"><div class="rl">Repositioning</div><div class="rv">{reposition}</div></div>
-    <div class="rc"><div class="rl">Primary GTM Channel</div><div class="rv">{channels_txt}</div></div>
-    <div class="rc"><div class="rl">Pricing Model</div><div class="rv">{pricing}</div></div>
-    {"<div class='rc' style='grid-column:span 2'><div class='rl'>Competitive Landscape Today</div><div class='rv'>" + comp_today + "</div></div>" if comp_today else ""}
+    <div class="rc"><div class="rl">Revised ICP</div><div class="rv">{{ icp }}</div></div>
+    <div class="rc"><div class="rl">Repositioning</div><div class="rv">{{ reposition }}</div></div>
+    <div class="rc"><div class="rl">Primary GTM Channel</div><div class="rv">{{ channels_txt }}</div></div>
+    <div class="rc"><div class="rl">Pricing Model</div><div class="rv">{{ pricing }}</div></div>
+    {% if comp_today %}<div class='rc' style='grid-column:span 2'><div class='rl'>Competitive Landscape Today</div><div class='rv'>{{ comp_today }}</div></div>{% endif %}
   </div>
-  {"<div style='margin-top:28px'><div class='sec-label' style='margin-bottom:10px'>What Not To Do</div><ul class='dont-list'>" + dont_rows + "</ul></div>" if dont_rows else ""}
+  {% if what_not %}<div style='margin-top:28px'><div class='sec-label' style='margin-bottom:10px'>What Not To Do</div><ul class='dont-list'>{% for d in what_not %}<li>{{ d }}</li>{% endfor %}</ul></div>{% endif %}
 </div></section>
 
 <section style="background:var(--s)"><div class="container">
   <div class="sec-label">Execution Plan</div><h2>90-Day Launch Roadmap</h2>
   <p class="sec-sub">Week by week. No fluff.</p>
-  <div>{plan_rows}</div>
+  <div>{% for p in plan %}
+      <div class="pr"><div class="pw">Week {{ p.get('week','') }}</div>
+      <div class="pa">{{ p.get('action','') }}</div></div>{% endfor %}</div>
 </div></section>
 
 <section><div class="container">
   <div class="sec-label">Risk Register</div><h2>What Could Kill the Revival</h2>
   <p class="sec-sub">Top 3 risks — and how to mitigate them early.</p>
-  <div class="risk-rows">{risk_rows}</div>
+  <div class="risk-rows">{% for r in risks %}
+      <div class="risk-row"><div class="risk-label">⚠ {{ r.get('risk','') }}</div>
+      <div class="risk-mit">→ {{ r.get('mitigation','') }}</div></div>{% endfor %}</div>
 </div></section>
 
 <section style="background:var(--s)"><div class="container">
   <div class="sec-label">Investor Pitch</div><h2>One-Page Summary</h2>
   <div class="pitch-card">
-    {"<div style='margin-bottom:16px'><div class='sec-label' style='margin-bottom:6px'>Top 3 Failure Factors</div><ul class='top3-list'>" + top3_rows + "</ul></div>" if top3_rows else ""}
-    {"".join(f"<div class='pitch-section'><div class='pl'>{lbl}</div><div class='pv'>{val}</div></div>" for lbl, key in [("Problem","problem"),("Solution","solution"),("Market","market"),("Why Now","why_now"),("Ask","ask")] for val in [pitch.get(key,"")] if val)}
+    {% if top3 %}<div style='margin-bottom:16px'><div class='sec-label' style='margin-bottom:6px'>Top 3 Failure Factors</div><ul class='top3-list'>{% for f in top3 %}<li>{{ f }}</li>{% endfor %}</ul></div>{% endif %}
+    {% for lbl, val in pitch_items %}<div class='pitch-section'><div class='pl'>{{ lbl }}</div><div class='pv'>{{ val }}</div></div>{% endfor %}
   </div>
 </div></section>
 
@@ -1030,19 +1617,86 @@ footer strong{{color:var(--a)}}
 </div></footer>
 </body></html>"""
 
-    progress = state.get("progress", []) + ["✅ Marketing landing page generated"]
-    return {**state, "marketing_html": html, "progress": progress}
+
+@functools.cache
+def _marketing_tpl():
+    """Compile the landing-page shell once; jinja2 is imported on first render."""
+    from jinja2 import Environment
+    return Environment(auto_reload=False, autoescape=True).from_string(_MARKETING_TPL)
+
+
+# Rendered pages keyed on a digest of everything the page is built from, so a
+# rerun whose agent outputs come back unchanged skips the template render
+_HTML_CACHE: LRUCache = LRUCache(maxsize=128)
+
+
+async def marketing_agent(state: AutopsyState) -> dict:
+    _log_agent("marketing", state)
+    progress = state.progress + ["✅ Marketing landing page generated"]
+
+    research   = state.research
+    autopsy    = state.autopsy
+    revival    = state.revival
+    copy_out   = state.copywriter_outputs
+    key = hashlib.blake2b(_encode((state.startup_name, research, autopsy, revival, copy_out)),
+                          digest_size=12).digest()
+    if (html := _HTML_CACHE.get(key)) is not None:
+        return {"marketing_html": html, "progress": progress}
+
+    pitch      = copy_out.get("revival_pitch", {})
+    card       = copy_out.get("autopsy_summary_card", {})
+
+    orig_name    = research.get("name",    state.startup_name)
+    revised_name = revival.get("revised_name", orig_name + " (Relaunch)")
+    orig_funding = research.get("funding", "")
+    score        = autopsy.get("overall_score", autopsy.get("score", 20))
+    hypothesis   = autopsy.get("primary_failure_hypothesis", "")
+    insight      = revival.get("core_insight", "")
+    icp          = revival.get("revised_icp", "")
+    reposition   = revival.get("repositioning_statement", "")
+    channels_txt = revival.get("gtm_strategy", {}).get("primary_channel", "")
+    pricing      = revival.get("gtm_strategy", {}).get("pricing_model", "")
+    what_not     = revival.get("gtm_strategy", {}).get("what_not_to_do", [])
+    plan         = revival.get("gtm_strategy", {}).get("90_day_plan", [])
+    risks        = revival.get("risk_register", [])
+    comp_today   = revival.get("competitive_landscape_today", "")
+    elevator     = copy_out.get("elevator_pitch", "")
+    top3         = card.get("top_3_factors", [])
+    killer_quote = card.get("killer_quote", "")
+
+    lenses = [(label, d, _RATING_COLORS[_RATING_IDX.get(d.get("rating", ""), 4)])
+              for key, label in _LENS_LABELS if (d := autopsy.get(key, {}))]
+    pitch_items = [(lbl, pitch[key]) for lbl, key in _PITCH_FIELDS if pitch.get(key)]
+
+    # Scalars are escaped once here; the template's autoescape passes the
+    # resulting Markup through untouched, however often a field is used. A
+    # null from the LLM becomes "" (escape(None) is a truthy "None"), so the
+    # template's if/or fallbacks still apply; a score of 0 is kept.
+    from markupsafe import escape
+    fields = {k: "" if v is None else escape(v) for k, v in dict(
+        orig_name=orig_name, orig_funding=orig_funding, revised_name=revised_name,
+        reposition=reposition, icp=icp, elevator=elevator, hypothesis=hypothesis, score=score,
+        killer_quote=killer_quote, insight=insight, channels_txt=channels_txt,
+        pricing=pricing, comp_today=comp_today,
+    ).items()}
+    html = _HTML_CACHE[key] = _marketing_tpl().render(
+        **fields, lenses=lenses, what_not=what_not, plan=plan,
+        risks=risks, top3=top3, pitch_items=pitch_items)
+    return {"marketing_html": html, "progress": progress}
 
 
 # ── Build & Compile Graph ─────────────────────────────────────────────────────
 def build_graph():
+    from langgraph.graph import StateGraph, START, END
     g = StateGraph(AutopsyState)
+    g.add_node("context_node",     context_node)
     g.add_node("research_node",    research_agent)
     g.add_node("autopsy_node",     autopsy_agent)
     g.add_node("revival_node",     revival_agent)
     g.add_node("copywriter_node",  copywriter_agent)
     g.add_node("marketing_node",   marketing_agent)
-    g.add_edge(START,              "research_node")
+    g.add_edge(START,              "context_node")
+    g.add_edge("context_node",     "research_node")
     g.add_edge("research_node",    "autopsy_node")
     g.add_edge("autopsy_node",     "revival_node")
     g.add_edge("revival_node",     "copywriter_node")
@@ -1050,32 +1704,74 @@ def build_graph():
     g.add_edge("marketing_node",   END)
     return g.compile()
 
-graph = build_graph()
-
-
-def run_analysis(payload: dict) -> dict:
-    initial: AutopsyState = {
-        "startup_name":        payload.get("startup_name", ""),
-        "industry":            payload.get("industry", ""),
-        "country":             payload.get("country", ""),
-        "year_founded":        payload.get("year_founded", ""),
-        "year_shutdown":       payload.get("year_shutdown", ""),
-        "funding_range":       payload.get("funding_range", ""),
-        "product_description": payload.get("product_description", ""),
-        "startup_overview":    payload.get("startup_overview", ""),
-        "why_failed_shutdown": payload.get("why_failed_shutdown", ""),
-        "founder_why_failed":  payload.get("founder_why_failed", ""),
-        "customer_feedback":   payload.get("customer_feedback", ""),
-        "pivots_tried":        payload.get("pivots_tried", ""),
-        "what_different":      payload.get("what_different", ""),
-        "context_signals":     payload.get("context_signals", []),
-        "research":            {},
-        "autopsy":             {},
-        "revival":             {},
-        "copywriter_outputs":  {},
-        "marketing_html":      "",
-        "progress":            [],
-        "data_confidence":     "medium",
-        "error":               None,
-    }
-    return graph.invoke(initial)
+
+@functools.cache
+def _get_graph():
+    return build_graph()
+
+
+def __getattr__(name: str):
+    # PEP 562: compile the LangGraph pipeline only when something asks for it
+    if name == "graph":
+        return _get_graph()
+    if name == "StateGraph":
+        from langgraph.graph import StateGraph
+        return StateGraph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Request fields copied into the initial state; everything else keeps the
+# dataclass defaults
+_PAYLOAD_KEYS = ("industry", "country", "year_founded", "year_shutdown", "funding_range",
+                 "product_description", "startup_overview", "why_failed_shutdown",
+                 "founder_why_failed", "customer_feedback", "pivots_tried", "what_different",
+                 "context_signals")
+
+
+async def run_analysis(payload) -> dict:
+    """Run the pipeline for a payload dict or a request model; a model is read
+    through its field __dict__ rather than dumped to a fresh dict."""
+    if not isinstance(payload, Mapping):
+        payload = vars(payload)
+    initial = AutopsyState(payload.get("startup_name", ""),
+                           **{k: payload[k] for k in _PAYLOAD_KEYS if k in payload})
+    _ensure_logging()
+    flag = [False]
+    _FELL_BACK.set(flag)
+    result = await _get_graph().ainvoke(initial)
+    # llm_fallback: some agent got a mock reply after an LLM error, so callers
+    # shouldn't keep this result around any longer than the response
+    return {**result, "llm_fallback": flag[0]}
+
+
+# Stages run in sequence, so each pipeline mostly has one LLM call in flight
+# (context_node's summaries briefly add a few) and this roughly caps
+# concurrent Deploy AI requests for a batch
+BATCH_CONCURRENCY = 16
+
+
+def payload_key(payload) -> str:
+    """
+    Digest of a payload's compact JSON. A request model's model_dump_json() and
+    the _encode of its model_dump() are the same bytes, so /analyse and batch
+    runs key one payload identically.
+    """
+    raw = payload.model_dump_json().encode() if hasattr(payload, "model_dump_json") else _encode(payload)
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+async def run_batch_analysis(payloads: list) -> list[dict]:
+    """
+    Run many startups through the pipeline concurrently, results in input order.
+    Identical payloads (seeded demos, re-uploaded rows) are analysed once.
+    """
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _one(payload) -> dict:
+        async with sem:
+            return await run_analysis(payload)
+
+    keys = [payload_key(p) for p in payloads]
+    unique = dict(zip(keys, payloads))
+    results = dict(zip(unique, await asyncio.gather(*(_one(p) for p in unique.values()))))
+    return [dict(results[k]) for k in keys]
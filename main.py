@@ -1,22 +1,72 @@
-import json, logging
+import os, gzip, queue, atexit, asyncio, functools, logging, logging.handlers
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-from agents import run_analysis
+import orjson
+from cachetools import LRUCache, TTLCache
+
+STATIC_DIR = Path(__file__).parent / "static"
+_INDEX_HTML = (STATIC_DIR / "index.html").read_bytes()
 
 log_dir = Path(__file__).parent / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(handlers=[logging.FileHandler(log_dir / "relaunch_main.json")], level=logging.INFO)
+# Handlers only enqueue; a listener thread does the file writes off the loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.FileHandler(log_dir / "relaunch_main.json"))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.basicConfig(handlers=[logging.handlers.QueueHandler(_log_queue)], level=logging.INFO)
+
+
+@functools.cache
+def _agents():
+    """Import the pipeline module on first use, so startup and /health don't pay for it."""
+    import agents
+    return agents
+
+
+async def _prewarm():
+    # The import runs on a worker thread so requests arriving meanwhile aren't
+    # stalled; the connection warm-up itself must happen on the serving loop
+    await (await asyncio.to_thread(_agents)).prewarm()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the Deploy AI connections without delaying startup; with prewarm off
+    # or no credentials, agents stays unimported until the first /analyse
+    task = None
+    if (os.getenv("RELAUNCH_PREWARM", "1") == "1"
+            and os.getenv("CLIENT_ID") and os.getenv("CLIENT_SECRET")):
+        task = asyncio.create_task(_prewarm())
+    yield
+    if task:
+        task.cancel()
 
-app = FastAPI(title="relaunch.ai")
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
-                   allow_methods=["*"], allow_headers=["*"])
 
-cache: dict[str, dict] = {}
+app = FastAPI(title="relaunch.ai", lifespan=lifespan)
+# The UI is same-origin and sends no cookies, so credentials stay off and a
+# wildcard origin is answered with a fixed header instead of echoing Origin.
+# Set CORS_ORIGINS (comma-separated) to lock it down to known hosts.
+CORS_ORIGINS = [o for o in map(str.strip, os.getenv("CORS_ORIGINS", "*").split(",")) if o]
+app.add_middleware(CORSMiddleware, allow_origins=CORS_ORIGINS,
+                   allow_methods=["GET", "POST"], allow_headers=["Content-Type"])
+
+# Landing pages by startup name as (utf-8 bytes, gzip bytes); the bytes are
+# shared with the results entry they came from, not copied
+pages: LRUCache = LRUCache(maxsize=128)
+
+# Encoded /analyse bodies and pages keyed by a hash of the canonical payload,
+# so an identical resubmission skips the LLM calls and all serialisation.
+# Entries expire like the LLM reply cache; runs that fell back to mock replies
+# after an LLM error are never stored.
+RESULT_CACHE_TTL = 86400
+results: TTLCache = TTLCache(maxsize=256, ttl=RESULT_CACHE_TTL)
 
 
 class AnalyseRequest(BaseModel):
@@ -44,9 +94,20 @@ async def analyse(req: AnalyseRequest):
     if not req.startup_name.strip():
         raise HTTPException(400, "startup_name is required")
     key = req.startup_name.strip().lower()
-    result = run_analysis(req.model_dump())
-    cache[key] = result
-    return JSONResponse({
+    pkey = _agents().payload_key(req)
+    if (hit := results.get(pkey)) is None:
+        result = await _agents().run_analysis(req)
+        hit = _encode_result(req, result)
+        if not result.get("llm_fallback"):
+            results[pkey] = hit
+    body, pages[key] = hit
+    return Response(body, media_type="application/json")
+
+
+def _encode_result(req: AnalyseRequest, result: dict) -> tuple[bytes, tuple[bytes, bytes]]:
+    """Serialise the /analyse envelope (orjson) and the landing page once per analysis."""
+    raw = (result.get("marketing_html") or "<p>No page.</p>").encode()
+    return orjson.dumps({
         "startup_name":       req.startup_name,
         "research":           result.get("research", {}),
         "autopsy":            result.get("autopsy", {}),
@@ -55,15 +116,35 @@ async def analyse(req: AnalyseRequest):
         "marketing_html":     result.get("marketing_html", ""),
         "progress":           result.get("progress", []),
         "data_confidence":    result.get("data_confidence", "medium"),
-    })
+    }), (raw, gzip.compress(raw, compresslevel=6))
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True if Accept-Encoding gives gzip (directly or via *) a non-zero q-value."""
+    prefs = {}
+    for part in accept_encoding.split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for p in params:
+            if p[:2].lower() == "q=":
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        prefs[coding.lower()] = q
+    return prefs.get("gzip", prefs.get("*", 0.0)) > 0
 
 
 @app.get("/preview/{startup_name}", response_class=HTMLResponse)
-async def preview(startup_name: str):
+async def preview(startup_name: str, request: Request):
     key = startup_name.strip().lower()
-    if key not in cache:
+    if (page := pages.get(key)) is None:
         raise HTTPException(404, "Run /analyse first.")
-    return HTMLResponse(cache[key].get("marketing_html", "<p>No page.</p>"))
+    raw, gz = page
+    # Both variants carry Vary so shared caches keep them apart
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        return Response(gz, media_type="text/html", headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return Response(raw, media_type="text/html", headers={"Vary": "Accept-Encoding"})
 
 
 @app.get("/health")
@@ -73,7 +154,7 @@ def health():
 
 @app.get("/", response_class=HTMLResponse)
 def root():
-    return HTMLResponse((Path(__file__).parent / "static" / "index.html").read_text())
+    return HTMLResponse(_INDEX_HTML)
 
 
-app.mount("/static", StaticFiles(directory=str(Path(__file__).parent / "static")), name="static")
+app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")